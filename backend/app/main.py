@@ -12,6 +12,7 @@ from .recommender import models as recommender_models  # noqa: F401
 
 from .api.v1 import router as api_v1_router
 from .api.admin import router as admin_router
+from .services.ml_infer import ensure_models_initialized
 
 
 APP_TITLE = "SkinHairAI API"
@@ -23,6 +24,12 @@ Base.metadata.create_all(bind=engine)
 app = FastAPI(title=APP_TITLE, version=APP_VERSION)
 
 
+@app.on_event("startup")
+def load_ml_models():
+    # Load the ML models before serving so the first request doesn't pay for it
+    ensure_models_initialized()
+
+
 @app.get("/")
 def read_root():
     return {"status": "ok", "message": f"{APP_TITLE} running"}
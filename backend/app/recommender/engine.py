@@ -27,8 +27,13 @@ Usage:
     )
 """
 
+import copy
+import hashlib
+import json
 import yaml
 import logging
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, List, Tuple, Any, Optional
 from datetime import datetime
@@ -36,6 +41,12 @@ from datetime import datetime
 logger = logging.getLogger(__name__)
 
 
+def _fingerprint(data: Dict[str, Any]) -> bytes:
+    """Stable 16-byte digest of a JSON-like dict, independent of key order."""
+    payload = json.dumps(data, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
 class RuleEngine:
     """
     Rule-based recommendation engine for skincare and haircare.
@@ -53,6 +64,9 @@ class RuleEngine:
         "emergency": 4,
     }
     
+    # Maximum number of (analysis, profile) results kept by apply_rules
+    CACHE_SIZE = 1024
+    
     def __init__(self, rules_path: Optional[str] = None):
         """
         Initialize the rule engine by loading YAML rules.
@@ -80,6 +94,11 @@ class RuleEngine:
         except yaml.YAMLError as e:
             logger.error(f"Failed to parse YAML rules: {e}")
             raise
+        
+        # LRU cache of apply_rules results keyed by input fingerprints
+        self._cache: "OrderedDict[bytes, Tuple[Dict[str, Any], List[str]]]" = OrderedDict()
+        # One engine serves concurrent requests; guards lookups and evictions
+        self._cache_lock = threading.Lock()
     
     def apply_rules(
         self,
@@ -158,7 +177,38 @@ class RuleEngine:
             }
             
             applied_rules_list: List of rule IDs that matched ["r001", "r003"]
+        
+        Results are memoized per (analysis, profile) content in a bounded LRU
+        cache. Callers always get their own deep copy, so mutating a returned
+        recommendation never affects the cache or later calls.
         """
+        key = _fingerprint(analysis) + _fingerprint(profile)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is not None:
+            recommendation, matched_rules = copy.deepcopy(cached)
+            recommendation["metadata"]["generated_at"] = datetime.utcnow().isoformat()
+            logger.debug(f"apply_rules cache hit: {matched_rules}")
+            return recommendation, matched_rules
+        
+        recommendation, matched_rules = self._evaluate_rules(analysis, profile)
+        
+        entry = copy.deepcopy((recommendation, matched_rules))
+        with self._cache_lock:
+            self._cache[key] = entry
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+        
+        return recommendation, matched_rules
+    
+    def _evaluate_rules(
+        self,
+        analysis: Dict[str, Any],
+        profile: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], List[str]]:
+        """Evaluate every rule against the inputs (uncached apply_rules)."""
         matched_rules = []
         recommendation = {
             "routines": [],
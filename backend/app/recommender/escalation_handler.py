@@ -5,10 +5,11 @@ Loads and manages escalation conditions that require medical attention.
 Integrates with RuleEngine to flag recommendations requiring professional care.
 """
 
+import sys
 import yaml
 import logging
 from pathlib import Path
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, FrozenSet
 from functools import lru_cache
 
 logger = logging.getLogger(__name__)
@@ -39,6 +40,7 @@ class EscalationHandler:
         self.escalation_file = escalation_file
         self._escalations = None
         self._conditions = None
+        self._escalation_keys = None
     
     @property
     def escalations(self) -> Dict[str, Any]:
@@ -51,9 +53,32 @@ class EscalationHandler:
     def conditions(self) -> Dict[str, Any]:
         """Get all escalation conditions."""
         if self._conditions is None:
-            self._conditions = self.escalations.get('escalations', {})
+            self._conditions = self._intern_conditions(self.escalations.get('escalations') or {})
         return self._conditions
     
+    # Short categorical fields compared on every lookup/filter
+    _INTERNED_FIELDS = ('severity', 'condition_type', 'urgency', 'action')
+    
+    @classmethod
+    def _intern_conditions(cls, raw: Dict[str, Any]) -> Dict[str, Any]:
+        """Intern condition names and categorical values so equality checks hit the identity fast path."""
+        conditions = {}
+        for name, data in raw.items():
+            if isinstance(data, dict):
+                for field in cls._INTERNED_FIELDS:
+                    value = data.get(field)
+                    if isinstance(value, str):
+                        data[field] = sys.intern(value)
+            conditions[sys.intern(name)] = data
+        return conditions
+    
+    @property
+    def escalation_keys(self) -> FrozenSet[str]:
+        """Frozen set of escalation condition names (cached)."""
+        if self._escalation_keys is None:
+            self._escalation_keys = frozenset(self.conditions)
+        return self._escalation_keys
+    
     def _load_escalations(self) -> Dict[str, Any]:
         """Load escalation.yml file."""
         try:
@@ -78,7 +103,10 @@ class EscalationHandler:
         Returns:
             Escalation data if found, None otherwise
         """
-        conditions = recommendation.get('conditions_detected', [])
+        # `or ()` treats a missing key, None and [] the same way
+        conditions = recommendation.get('conditions_detected') or ()
+        if not conditions:
+            return None
         
         for condition in conditions:
             if condition in self.conditions:
@@ -92,6 +120,38 @@ class EscalationHandler:
         
         return None
     
+    def check_recommendations_batch(
+        self, recommendations: List[Dict[str, Any]]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Check many recommendations for escalation conditions in one pass.
+        
+        Args:
+            recommendations: List of recommendation dicts with conditions_detected field
+        
+        Returns:
+            List aligned with the input: escalation data per recommendation, or None
+        """
+        keys = self.escalation_keys
+        conditions = self.conditions
+        results: List[Optional[Dict[str, Any]]] = []
+        
+        for recommendation in recommendations:
+            detected = recommendation.get('conditions_detected') or ()
+            hit = next((c for c in detected if c in keys), None)
+            
+            if hit is None:
+                results.append(None)
+                continue
+            
+            escalation_data = conditions[hit]
+            logger.warning(
+                f"ESCALATION DETECTED: {hit} - {escalation_data.get('medical_advice')}"
+            )
+            results.append(escalation_data)
+        
+        return results
+    
     def check_condition(self, condition: str) -> Optional[Dict[str, Any]]:
         """
         Check if specific condition is an escalation.
@@ -215,7 +275,7 @@ def check_escalation(recommendation: Dict[str, Any]) -> Optional[Dict[str, Any]]
         # Extract condition name from the escalation dict
         # Find which condition this escalation belongs to
         for cond_name in handler.get_all_escalation_conditions():
-            if handler.conditions[cond_name] == escalation:
+            if handler.conditions[cond_name] is escalation:
                 return handler.format_escalation_response(cond_name)
     
     return None
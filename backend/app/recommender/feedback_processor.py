@@ -7,37 +7,52 @@ Periodically processes feedback data and exports labeled pairs for ML model trai
 - Anonymization: Removes user_id, anonymizes age, drops raw image URLs
 - Privacy: Respects user opt-in preferences for training data usage
 
-Output: CSV files in ml/feedback_training/ directory
+Output: gzip-compressed CSV files in ml/feedback_training/ directory
 """
 
+import calendar
 import csv
+import gzip
 import logging
+import math
 import os
+import re
+import struct
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache, partial
+from hashlib import blake2b
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from dataclasses import dataclass, asdict, fields
+from operator import attrgetter
 
-from sqlalchemy import create_engine
+from sqlalchemy import case, create_engine, select
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.sql import func
 
 from backend.app.db.session import SessionLocal
-from backend.app.models.db_models import User, Analysis
+from backend.app.models.db_models import User, Profile, Analysis
 from backend.app.recommender.models import RecommendationRecord, RecommendationFeedback
 
 logger = logging.getLogger(__name__)
 
+# Key for anonymization hashes; override per deployment via FEEDBACK_SALT
+DEFAULT_FEEDBACK_SALT = "haski_feedback_anonymization"
+
 
 # ===== DATA CLASSES =====
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class FeedbackTrainingPair:
     """
     Anonymized feedback pair for ML training.
     
     This is the output format exported to CSV.
     No user_id or personal identifiers.
+    
+    Slotted and immutable: one instance is created per exported row.
     """
     # IDs (anonymized)
     analysis_hash: str  # Hash of analysis_id for linking without exposing ID
@@ -58,14 +73,60 @@ class FeedbackTrainingPair:
     age_range: Optional[str]  # "18-25", "25-35", "35-50", "50+"
     
     # Processing metadata
-    feedback_timestamp: str  # ISO format
+    feedback_timestamp: int  # Unix epoch seconds (UTC)
     export_date: str  # When was this exported
     
     def to_dict(self) -> Dict:
-        """Convert to dictionary for CSV writing."""
+        """Convert to dictionary."""
         return asdict(self)
 
 
+# CSV column order and a C-level row extractor (cheaper than to_dict/astuple per row)
+TRAINING_PAIR_FIELDS = tuple(f.name for f in fields(FeedbackTrainingPair))
+_pair_row = attrgetter(*TRAINING_PAIR_FIELDS)
+
+# Fields csv.writer (excel dialect, QUOTE_MINIMAL) would wrap in quotes
+_CSV_NEEDS_QUOTING = re.compile(r'[",\r\n]')
+_CSV_NUMERIC_TYPES = (int, bool, Optional[int], Optional[bool])
+
+
+def _csv_field(value: Any) -> str:
+    """Format one text field exactly as csv.writer would."""
+    if value is None:
+        return ""
+    if value.__class__ is not str:
+        value = str(value)
+    if _CSV_NEEDS_QUOTING.search(value):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def _build_csv_emitter():
+    """
+    Generate a row serializer specialized for FeedbackTrainingPair.
+    
+    The schema is fixed, so instead of csv.writer's per-field type dispatch
+    we emit one expression per column: numbers and bools are never quoted,
+    text goes through _csv_field. Output is byte-identical to csv.writer.
+    """
+    parts = []
+    for f in fields(FeedbackTrainingPair):
+        if f.type in _CSV_NUMERIC_TYPES:
+            parts.append(f"('' if p.{f.name} is None else str(p.{f.name}))")
+        else:
+            parts.append(f"_csv_field(p.{f.name})")
+    source = (
+        "def _emit_csv_row(p):\n"
+        f"    return ','.join(({', '.join(parts)},)) + '\\r\\n'\n"
+    )
+    namespace = {"_csv_field": _csv_field}
+    exec(compile(source, "<feedback_csv_emitter>", "exec"), namespace)
+    return namespace["_emit_csv_row"]
+
+
+_emit_csv_row = _build_csv_emitter()
+
+
 @dataclass
 class FeedbackProcessingStats:
     """Statistics from feedback processing run."""
@@ -77,6 +138,306 @@ class FeedbackProcessingStats:
     errors: int = 0
     execution_time_seconds: float = 0.0
     export_filename: str = ""
+    parquet_filename: str = ""
+
+
+@lru_cache(maxsize=4096)
+def _join_items(items: Tuple[str, ...]) -> Optional[str]:
+    """
+    Comma-join a canonical (sorted) tuple of condition/rule names.
+    
+    Condition and rule vocabularies are small, so most rows hit the cache.
+    """
+    return ",".join(items) if items else None
+
+
+class FeedbackRow(NamedTuple):
+    """Plain (picklable) scalar fields needed to build one training pair."""
+    feedback_id: int
+    helpful_rating: Optional[int]
+    product_satisfaction: Optional[int]
+    routine_completion_pct: Optional[int]
+    would_recommend: Optional[bool]
+    timeframe: Optional[str]
+    created_at: datetime
+    analysis_id: int
+    recommendation_id: str
+    conditions: Optional[List[Any]]
+    rules: Optional[List[Any]]
+    age_range: Optional[str]
+
+
+@lru_cache(maxsize=200_000)
+def _hash_id(id_value: int, salt: bytes) -> str:
+    """
+    Keyed BLAKE2b hash of an ID (16 hex chars).
+    
+    Memoized on (id, salt): the same analysis shows up once per feedback
+    row, and a cache hit is far cheaper than a keyed BLAKE2b call.
+    """
+    return blake2b(
+        int(id_value).to_bytes(8, "little", signed=True),
+        digest_size=8,
+        key=salt
+    ).hexdigest()
+
+
+def _row_to_pair(row: FeedbackRow, salt: bytes, export_date: str) -> Optional[FeedbackTrainingPair]:
+    """
+    Build an anonymized training pair from one feedback row.
+    
+    Pure module-level function so it can run in worker processes.
+    export_date is the run's preformatted ISO timestamp, shared by all rows.
+    
+    Returns:
+        FeedbackTrainingPair or None if record should be skipped
+    """
+    try:
+        # Check if user opted in for training data usage
+        # (For now, we'll always include unless explicitly opted-out)
+        # TODO: Add training_data_opt_in field to User model
+        
+        # Extract and validate data
+        helpful_rating = row.helpful_rating if row.helpful_rating else None
+        product_satisfaction = row.product_satisfaction if row.product_satisfaction else None
+        routine_completion_pct = row.routine_completion_pct if row.routine_completion_pct else None
+        would_recommend = row.would_recommend
+        
+        # Check minimum feedback fields filled
+        if (helpful_rating is None and product_satisfaction is None
+                and routine_completion_pct is None and would_recommend is None):
+            logger.debug(f"Skipping feedback {row.feedback_id}: no ratings provided")
+            return None
+        
+        return FeedbackTrainingPair(
+            analysis_hash=_hash_id(row.analysis_id, salt),
+            recommendation_id=row.recommendation_id,
+            
+            helpful_rating=helpful_rating,
+            product_satisfaction=product_satisfaction,
+            routine_completion_pct=routine_completion_pct,
+            would_recommend=would_recommend,
+            
+            conditions_detected=_join_items(tuple(sorted(map(str, row.conditions or ())))),
+            rules_applied=_join_items(tuple(sorted(map(str, row.rules or ())))),
+            
+            timeframe=row.timeframe,
+            age_range=row.age_range,
+            
+            feedback_timestamp=calendar.timegm(row.created_at.utctimetuple()),
+            export_date=export_date
+        )
+        
+    except Exception as e:
+        logger.error(f"Error processing feedback record {row.feedback_id}: {e}")
+        return None
+
+
+# Algorithm behind _get_pair_hash digests. Recorded in the seen-pairs filter,
+# whose stored bits are only meaningful for digests from the same algorithm.
+PAIR_HASH_ALGORITHM = "blake2b-64"
+
+
+class _BloomSlice:
+    """One fixed-size Bloom filter slice of a SeenPairsFilter."""
+    
+    __slots__ = ("capacity", "num_bits", "num_hashes", "count", "bits")
+    
+    # capacity, bit count, hash count, digests added
+    HEADER = struct.Struct("<QQIQ")
+    
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = 0
+        self.bits = bytearray((self.num_bits + 7) // 8)
+    
+    def _positions(self, digest: int):
+        # Double hashing: the 64-bit digest is already uniform, split it in two
+        h1 = digest & 0xFFFFFFFF
+        h2 = (digest >> 32) | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+    
+    def __contains__(self, digest: int) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+    
+    def add(self, digest: int) -> None:
+        bits = self.bits
+        for pos in self._positions(digest):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+
+class SeenPairsFilter:
+    """
+    Scalable Bloom filter over 64-bit pair digests, persisted between export runs.
+    
+    Lets daily exports skip pairs already exported on previous days without
+    keeping every historical digest in memory. A false positive only drops
+    one training example; it never corrupts exported data.
+    
+    The filter grows instead of saturating: once the newest slice holds its
+    capacity, a slice GROWTH_FACTOR times larger with a TIGHTENING_RATIO times
+    lower error rate is chained on. The slice error rates form a geometric
+    series, so the compounded false-positive rate stays within error_rate
+    however many pairs accumulate.
+    
+    Usage:
+        seen = SeenPairsFilter.load(path)
+        if digest not in seen:
+            seen.add(digest)
+        seen.save(path)
+    """
+    
+    GROWTH_FACTOR = 2
+    TIGHTENING_RATIO = 0.5
+    
+    _MAGIC = b"SPBF"
+    _VERSION = 2
+    # magic, format version, pair hash algorithm, error rate, slice count
+    _HEADER = struct.Struct("<4sB16sdI")
+    _LEGACY_HEADER = struct.Struct("<QI")  # unversioned single-filter files: bit count, hash count
+    
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        """
+        Size the first slice for `capacity` digests at the given false-positive rate.
+        """
+        self.error_rate = error_rate
+        self.slices: List[_BloomSlice] = [_BloomSlice(capacity, error_rate * self.TIGHTENING_RATIO)]
+    
+    @property
+    def num_bits(self) -> int:
+        """Total bits across all slices."""
+        return sum(s.num_bits for s in self.slices)
+    
+    def __contains__(self, digest: int) -> bool:
+        return any(digest in s for s in self.slices)
+    
+    def add(self, digest: int) -> None:
+        newest = self.slices[-1]
+        if newest.count >= newest.capacity:
+            newest = _BloomSlice(
+                newest.capacity * self.GROWTH_FACTOR,
+                self.error_rate * self.TIGHTENING_RATIO ** (len(self.slices) + 1)
+            )
+            self.slices.append(newest)
+            logger.info(
+                f"Seen-pairs filter full, added slice {len(self.slices)} "
+                f"(capacity {newest.capacity})"
+            )
+        newest.add(digest)
+    
+    def save(self, path: Path) -> None:
+        """
+        Write the filter to disk atomically.
+        
+        Written to a sibling temp file and moved into place, so a crash
+        mid-write leaves the previous filter intact.
+        """
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(self._HEADER.pack(
+                self._MAGIC, self._VERSION, PAIR_HASH_ALGORITHM.encode(),
+                self.error_rate, len(self.slices)
+            ))
+            for s in self.slices:
+                f.write(_BloomSlice.HEADER.pack(s.capacity, s.num_bits, s.num_hashes, s.count))
+                f.write(s.bits)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: Path, **kwargs) -> "SeenPairsFilter":
+        """
+        Read a filter from disk, or create an empty one if none exists.
+        
+        Filters whose digests came from another hash algorithm, or from files
+        that predate the algorithm tag, can't answer membership for current
+        digests; they are replaced by an empty filter with a warning.
+        
+        Raises:
+            ValueError: If the file is not a seen-pairs filter or is truncated
+        """
+        if not Path(path).exists():
+            return cls(**kwargs)
+        
+        with open(path, "rb") as f:
+            data = f.read()
+        
+        if data[:4] != cls._MAGIC:
+            cls._check_legacy(path, data)
+            return cls._replaced(path, "it predates the hash algorithm tag", **kwargs)
+        if len(data) < 5:
+            raise ValueError(f"Seen-pairs filter {path} is truncated")
+        if data[4] < cls._VERSION:
+            return cls._replaced(path, "it predates the hash algorithm tag", **kwargs)
+        if data[4] != cls._VERSION:
+            raise ValueError(f"{path} is not a version {cls._VERSION} seen-pairs filter")
+        if len(data) < cls._HEADER.size:
+            raise ValueError(f"Seen-pairs filter {path} is truncated")
+        
+        _, _, algorithm, error_rate, num_slices = cls._HEADER.unpack_from(data)
+        algorithm = algorithm.rstrip(b"\0").decode(errors="replace")
+        if algorithm != PAIR_HASH_ALGORITHM:
+            return cls._replaced(path, f"its digests use {algorithm!r}", **kwargs)
+        
+        seen = cls.__new__(cls)
+        seen.error_rate = error_rate
+        seen.slices = []
+        offset = cls._HEADER.size
+        for _ in range(num_slices):
+            if len(data) < offset + _BloomSlice.HEADER.size:
+                raise ValueError(f"Seen-pairs filter {path} is truncated")
+            bloom = _BloomSlice.__new__(_BloomSlice)
+            bloom.capacity, bloom.num_bits, bloom.num_hashes, bloom.count = (
+                _BloomSlice.HEADER.unpack_from(data, offset)
+            )
+            offset += _BloomSlice.HEADER.size
+            
+            num_bytes = (bloom.num_bits + 7) // 8
+            bloom.bits = bytearray(data[offset:offset + num_bytes])
+            if len(bloom.bits) != num_bytes:
+                raise ValueError(
+                    f"Seen-pairs filter {path} is truncated: expected {num_bytes} "
+                    f"bytes of bits, found {len(bloom.bits)}"
+                )
+            offset += num_bytes
+            seen.slices.append(bloom)
+        
+        if offset != len(data) or not seen.slices:
+            raise ValueError(f"Seen-pairs filter {path} has an invalid size")
+        return seen
+    
+    @classmethod
+    def _check_legacy(cls, path: Path, data: bytes) -> None:
+        """Raise ValueError unless data is a complete unversioned single-filter file."""
+        if len(data) < cls._LEGACY_HEADER.size:
+            raise ValueError(f"Seen-pairs filter {path} is truncated")
+        num_bits, _ = cls._LEGACY_HEADER.unpack_from(data)
+        num_bytes = len(data) - cls._LEGACY_HEADER.size
+        if num_bytes != (num_bits + 7) // 8:
+            raise ValueError(
+                f"Seen-pairs filter {path} is truncated: expected {(num_bits + 7) // 8} "
+                f"bytes of bits, found {num_bytes}"
+            )
+    
+    @classmethod
+    def _replaced(cls, path: Path, reason: str, **kwargs) -> "SeenPairsFilter":
+        """Start an empty filter in place of an unusable one."""
+        logger.warning(
+            f"Ignoring seen-pairs filter {path}: {reason} (pair hash is {PAIR_HASH_ALGORITHM!r}). "
+            f"Starting a new filter; pairs from earlier runs may be exported again."
+        )
+        return cls(**kwargs)
+
+
+# Sentinel: derive the age bucket from user.profile instead of the query
+_AGE_FROM_PROFILE = object()
 
 
 # ===== MAIN PROCESSOR CLASS =====
@@ -101,26 +462,51 @@ class FeedbackProcessor:
         print(f"Exported {stats.exported_records} training pairs")
     """
     
-    def __init__(self, db_session: Optional[Session] = None, output_dir: str = "ml/feedback_training/"):
+    # Persisted Bloom filter of pairs exported by earlier runs (see persist_seen)
+    SEEN_FILTER_FILENAME = ".seen.bloom"
+    
+    # Row counts at which pair building moves to a process pool
+    PARALLEL_MIN_ROWS = 10_000
+    PARALLEL_CHUNK_ROWS = 1000
+    
+    def __init__(
+        self,
+        db_session: Optional[Session] = None,
+        output_dir: str = "ml/feedback_training/",
+        persist_seen: bool = False,
+        compress_csv: bool = True
+    ):
         """
         Initialize feedback processor.
         
         Args:
             db_session: SQLAlchemy session. Defaults to SessionLocal.
             output_dir: Output directory for CSV files.
+            persist_seen: Deduplicate against pairs exported by previous runs
+                using a Bloom filter stored in output_dir.
+            compress_csv: Write gzip-compressed .csv.gz files.
         """
         self.db = db_session or SessionLocal()
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
         self.stats = FeedbackProcessingStats()
-        self.seen_pairs = set()  # For deduplication
+        self.seen_pairs: Set[int] = set()  # Pair digests, for deduplication
+        self.persist_seen = persist_seen
+        self.compress_csv = compress_csv
+        
+        # BLAKE2b keys are capped at 64 bytes
+        self._salt = os.environ.get("FEEDBACK_SALT", DEFAULT_FEEDBACK_SALT).encode()[:64]
+        
+        # Formatted once per run rather than once per exported pair
+        self._export_date_iso = datetime.utcnow().isoformat()
     
     def process_and_export(
         self,
         days_back: int = 30,
         min_feedback_fields: int = 1,
-        output_dir: Optional[str] = None
+        output_dir: Optional[str] = None,
+        export_parquet: bool = False
     ) -> FeedbackProcessingStats:
         """
         Main entry point: process feedback and export to CSV.
@@ -129,6 +515,7 @@ class FeedbackProcessor:
             days_back: Only process feedback from last N days
             min_feedback_fields: Minimum number of feedback fields filled (1-5)
             output_dir: Override output directory
+            export_parquet: Also write a Parquet file (requires pyarrow)
         
         Returns:
             FeedbackProcessingStats with processing results
@@ -138,37 +525,56 @@ class FeedbackProcessor:
             self.output_dir.mkdir(parents=True, exist_ok=True)
         
         start_time = datetime.now()
+        self._export_date_iso = datetime.utcnow().isoformat()
+        
+        if self.persist_seen:
+            seen_path = self.output_dir / self.SEEN_FILTER_FILENAME
+            self.seen_pairs = SeenPairsFilter.load(seen_path)
         
         try:
             # Step 1: Query feedback
             cutoff_date = datetime.utcnow() - timedelta(days=days_back)
-            feedback_records = self._query_feedback(cutoff_date, min_feedback_fields)
-            self.stats.total_feedback_records = len(feedback_records)
+            rows = self._query_feedback(cutoff_date, min_feedback_fields)
+            self.stats.total_feedback_records = len(rows)
             
-            logger.info(f"Processing {len(feedback_records)} feedback records from last {days_back} days")
+            logger.info(f"Processing {len(rows)} feedback records from last {days_back} days")
             
-            # Step 2: Process and anonymize
-            training_pairs = []
-            for feedback, recommendation, analysis, user in feedback_records:
-                pair = self._process_feedback_record(feedback, recommendation, analysis, user)
-                
-                if pair:
-                    # Step 3: Deduplication
-                    pair_hash = self._get_pair_hash(pair)
-                    if pair_hash not in self.seen_pairs:
-                        training_pairs.append(pair)
-                        self.seen_pairs.add(pair_hash)
-                        self.stats.anonymized_records += 1
+            # Step 2: Process and anonymize (lazily, consumed by the CSV writer)
+            # Counters are plain locals in the hot loop and folded into
+            # self.stats once the export has been written.
+            exported = deduplicated = skipped = 0
+            
+            def training_pairs():
+                nonlocal exported, deduplicated, skipped
+                seen_pairs = self.seen_pairs
+                get_pair_hash = self._get_pair_hash
+                for pair in self._rows_to_pairs(rows):
+                    if pair:
+                        # Step 3: Deduplication
+                        pair_hash = get_pair_hash(pair)
+                        if pair_hash not in seen_pairs:
+                            seen_pairs.add(pair_hash)
+                            exported += 1
+                            yield pair
+                        else:
+                            deduplicated += 1
                     else:
-                        self.stats.deduplicated_records += 1
-                else:
-                    self.stats.skipped_records += 1
+                        skipped += 1
             
-            # Step 4: Export to CSV
-            self.stats.exported_records = len(training_pairs)
-            export_filename = self._export_to_csv(training_pairs)
+            # Step 4: Stream to CSV (Parquet needs the pairs twice, so materialize)
+            pairs = list(training_pairs()) if export_parquet else training_pairs()
+            export_filename = self._export_to_csv(pairs)
+            if export_parquet:
+                self.stats.parquet_filename = self._export_to_parquet(pairs)
+            self.stats.anonymized_records += exported
+            self.stats.deduplicated_records += deduplicated
+            self.stats.skipped_records += skipped
+            self.stats.exported_records = exported
             self.stats.export_filename = export_filename
             
+            if self.persist_seen:
+                self.seen_pairs.save(seen_path)
+            
             # Step 5: Calculate statistics
             self.stats.execution_time_seconds = (datetime.now() - start_time).total_seconds()
             
@@ -182,32 +588,54 @@ class FeedbackProcessor:
             self.stats.errors += 1
             raise
     
+    # Rows fetched per round-trip while streaming query results
+    QUERY_BATCH_ROWS = 2048
+    
     def _query_feedback(
         self,
         cutoff_date: datetime,
         min_feedback_fields: int
-    ) -> List[Tuple]:
+    ) -> List[FeedbackRow]:
         """
         Query feedback records with related data.
         
+        Fetches only the scalar columns a training pair needs in a single
+        JOIN, skipping ORM instance hydration. The age bucket is computed by
+        the database from Profile.age.
+        
         Returns:
-            List of (feedback, recommendation, analysis, user) tuples
+            List of FeedbackRow tuples
         """
+        stmt = select(
+            RecommendationFeedback.id,
+            RecommendationFeedback.helpful_rating,
+            RecommendationFeedback.product_satisfaction,
+            RecommendationFeedback.routine_completion_pct,
+            RecommendationFeedback.would_recommend,
+            RecommendationFeedback.timeframe,
+            RecommendationFeedback.created_at,
+            Analysis.id,
+            RecommendationRecord.recommendation_id,
+            RecommendationRecord.conditions_analyzed,
+            RecommendationRecord.rules_applied,
+            self._age_range_column()
+        ).join(
+            RecommendationRecord, RecommendationFeedback.recommendation_id == RecommendationRecord.id
+        ).join(
+            Analysis, RecommendationRecord.analysis_id == Analysis.id
+        ).join(
+            User, Analysis.user_id == User.id
+        ).outerjoin(
+            Profile, Profile.user_id == User.id
+        ).where(
+            RecommendationFeedback.created_at >= cutoff_date
+        ).execution_options(yield_per=self.QUERY_BATCH_ROWS)
+        
         try:
-            records = self.db.query(
-                RecommendationFeedback,
-                RecommendationRecord,
-                Analysis,
-                User
-            ).filter(
-                RecommendationFeedback.created_at >= cutoff_date,
-                RecommendationFeedback.recommendation_id == RecommendationRecord.id,
-                RecommendationRecord.analysis_id == Analysis.id,
-                Analysis.user_id == User.id
-            ).all()
+            rows = [FeedbackRow._make(row) for row in self.db.execute(stmt)]
             
-            logger.info(f"Queried {len(records)} feedback records with related data")
-            return records
+            logger.info(f"Queried {len(rows)} feedback records with related data")
+            return rows
             
         except Exception as e:
             logger.error(f"Error querying feedback: {e}")
@@ -218,125 +646,237 @@ class FeedbackProcessor:
         feedback: RecommendationFeedback,
         recommendation: RecommendationRecord,
         analysis: Analysis,
-        user: User
+        user: User,
+        age_range: Optional[str] = _AGE_FROM_PROFILE
     ) -> Optional[FeedbackTrainingPair]:
         """
         Process single feedback record and anonymize.
         
+        Args:
+            age_range: Age bucket precomputed by the query; when omitted it
+                is derived from user.profile
+        
         Returns:
             FeedbackTrainingPair or None if record should be skipped
         """
-        try:
-            # Check if user opted in for training data usage
-            # (For now, we'll always include unless explicitly opted-out)
-            # TODO: Add training_data_opt_in field to User model
-            
-            # Extract and validate data
-            helpful_rating = feedback.helpful_rating if feedback.helpful_rating else None
-            product_satisfaction = feedback.product_satisfaction if feedback.product_satisfaction else None
-            routine_completion_pct = feedback.routine_completion_pct if feedback.routine_completion_pct else None
-            would_recommend = feedback.would_recommend if feedback.would_recommend is not None else None
-            
-            # Check minimum feedback fields filled
-            ratings_provided = sum([
-                helpful_rating is not None,
-                product_satisfaction is not None,
-                routine_completion_pct is not None,
-                would_recommend is not None
-            ])
-            
-            if ratings_provided == 0:
-                logger.debug(f"Skipping feedback {feedback.id}: no ratings provided")
-                return None
-            
-            # Extract conditions and rules (from recommendation metadata)
-            conditions = recommendation.conditions_analyzed or []
-            rules = recommendation.rules_applied or []
-            
-            # Anonymize
-            analysis_hash = self._hash_id(analysis.id)
+        return _row_to_pair(
+            self._to_row(feedback, recommendation, analysis, user, age_range),
+            self._salt,
+            self._export_date_iso
+        )
+    
+    def _to_row(
+        self,
+        feedback: RecommendationFeedback,
+        recommendation: RecommendationRecord,
+        analysis: Analysis,
+        user: User,
+        age_range: Optional[str] = _AGE_FROM_PROFILE
+    ) -> FeedbackRow:
+        """Copy the fields a training pair needs off the ORM objects."""
+        if age_range is _AGE_FROM_PROFILE:
             age_range = self._bucket_age(user.profile.age if user.profile else None)
-            
-            # Create training pair
-            pair = FeedbackTrainingPair(
-                analysis_hash=analysis_hash,
-                recommendation_id=recommendation.recommendation_id,
-                
-                helpful_rating=helpful_rating,
-                product_satisfaction=product_satisfaction,
-                routine_completion_pct=routine_completion_pct,
-                would_recommend=would_recommend,
-                
-                conditions_detected=",".join(str(c) for c in conditions) if conditions else None,
-                rules_applied=",".join(str(r) for r in rules) if rules else None,
-                
-                timeframe=feedback.timeframe,
-                age_range=age_range,
-                
-                feedback_timestamp=feedback.created_at.isoformat(),
-                export_date=datetime.utcnow().isoformat()
-            )
-            
-            return pair
-            
-        except Exception as e:
-            logger.error(f"Error processing feedback record {feedback.id}: {e}")
-            return None
+        
+        return FeedbackRow(
+            feedback_id=feedback.id,
+            helpful_rating=feedback.helpful_rating,
+            product_satisfaction=feedback.product_satisfaction,
+            routine_completion_pct=feedback.routine_completion_pct,
+            would_recommend=feedback.would_recommend,
+            timeframe=feedback.timeframe,
+            created_at=feedback.created_at,
+            analysis_id=analysis.id,
+            recommendation_id=recommendation.recommendation_id,
+            conditions=recommendation.conditions_analyzed,
+            rules=recommendation.rules_applied,
+            age_range=age_range
+        )
     
-    def _export_to_csv(self, training_pairs: List[FeedbackTrainingPair]) -> str:
+    def _rows_to_pairs(self, rows: List[FeedbackRow]) -> Iterable[Optional[FeedbackTrainingPair]]:
+        """
+        Map rows to training pairs, in worker processes for large batches.
+        
+        Below PARALLEL_MIN_ROWS the pickling overhead outweighs the gain,
+        so small batches are processed inline.
+        """
+        to_pair = partial(_row_to_pair, salt=self._salt, export_date=self._export_date_iso)
+        
+        if len(rows) < self.PARALLEL_MIN_ROWS:
+            yield from map(to_pair, rows)
+            return
+        
+        with ProcessPoolExecutor() as executor:
+            yield from executor.map(to_pair, rows, chunksize=self.PARALLEL_CHUNK_ROWS)
+    
+    # Large write buffer and chunked writerows keep per-row overhead low
+    # without holding the whole export in memory
+    _CSV_BUFFER_SIZE = 1 << 23  # 8 MiB
+    _CSV_CHUNK_ROWS = 1000
+    
+    def _export_to_csv(
+        self,
+        training_pairs: Iterable[FeedbackTrainingPair],
+        use_csv_module: bool = False
+    ) -> str:
         """
         Export training pairs to CSV file.
         
+        Accepts any iterable (including generators) and streams it to disk
+        in chunks, so memory stays O(chunk) rather than O(rows).
+        
+        Args:
+            training_pairs: Pairs to export
+            use_csv_module: Serialize rows with csv.writer instead of the
+                generated emitter (same output, slower)
+        
         Returns:
             Filename of exported CSV
         """
-        if not training_pairs:
+        pairs = iter(training_pairs)
+        first = next(pairs, None)
+        
+        if first is None:
             logger.warning("No training pairs to export")
             return ""
         
         # Generate filename with timestamp
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         filename = f"feedback_training_{timestamp}.csv"
+        if self.compress_csv:
+            filename += ".gz"
         filepath = self.output_dir / filename
         
         try:
-            # Write CSV
-            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = list(asdict(training_pairs[0]).keys())
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            # Write CSV (gzip level 1: the repetitive rows compress ~5x for
+            # little CPU, so the write is no longer IO-bound)
+            if self.compress_csv:
+                csvfile = gzip.open(filepath, 'wt', compresslevel=1, newline='', encoding='utf-8')
+            else:
+                csvfile = open(
+                    filepath, 'w', newline='', encoding='utf-8', buffering=self._CSV_BUFFER_SIZE
+                )
+            
+            with csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(TRAINING_PAIR_FIELDS)
                 
-                writer.writeheader()
-                for pair in training_pairs:
-                    writer.writerow(pair.to_dict())
+                # Generated emitter by default; csv.writer kept as a reference path
+                if use_csv_module:
+                    to_row, write_rows = _pair_row, writer.writerows
+                else:
+                    to_row = _emit_csv_row
+                    write_rows = lambda lines: csvfile.write("".join(lines))
+                
+                chunk = [to_row(first)]
+                written = 0
+                for pair in pairs:
+                    chunk.append(to_row(pair))
+                    if len(chunk) >= self._CSV_CHUNK_ROWS:
+                        write_rows(chunk)
+                        written += len(chunk)
+                        chunk.clear()
+                write_rows(chunk)
+                written += len(chunk)
             
-            logger.info(f"Exported {len(training_pairs)} training pairs to {filepath}")
+            logger.info(f"Exported {written} training pairs to {filepath}")
             return str(filepath)
             
         except Exception as e:
             logger.error(f"Error writing CSV file: {e}")
             raise
     
-    def _get_pair_hash(self, pair: FeedbackTrainingPair) -> str:
+    def _export_to_parquet(self, training_pairs: Iterable[FeedbackTrainingPair]) -> str:
+        """
+        Export training pairs to a zstd-compressed Parquet file.
+        
+        Columns are typed (int8 ratings, bool, int64 timestamps) and the
+        low-cardinality string columns are dictionary-encoded.
+        
+        Returns:
+            Filename of exported Parquet file
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("pyarrow not installed. Install with: pip install pyarrow")
+        
+        rows = [_pair_row(pair) for pair in training_pairs]
+        
+        if not rows:
+            logger.warning("No training pairs to export")
+            return ""
+        
+        column_types = {
+            "helpful_rating": pa.int8(),
+            "product_satisfaction": pa.int8(),
+            "routine_completion_pct": pa.int8(),
+            "would_recommend": pa.bool_(),
+            "feedback_timestamp": pa.int64(),
+        }
+        dictionary_columns = {"conditions_detected", "rules_applied", "timeframe", "age_range"}
+        
+        columns = {}
+        for name, values in zip(TRAINING_PAIR_FIELDS, zip(*rows)):
+            array = pa.array(values, type=column_types.get(name, pa.string()))
+            columns[name] = array.dictionary_encode() if name in dictionary_columns else array
+        
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        filepath = self.output_dir / f"feedback_training_{timestamp}.parquet"
+        
+        try:
+            pq.write_table(pa.table(columns), filepath, compression="zstd")
+            logger.info(f"Exported {len(rows)} training pairs to {filepath}")
+            return str(filepath)
+            
+        except Exception as e:
+            logger.error(f"Error writing Parquet file: {e}")
+            raise
+    
+    def _get_pair_hash(self, pair: FeedbackTrainingPair) -> int:
         """
         Generate hash for deduplication.
         
-        Used to detect duplicate feedback pairs.
+        Used to detect duplicate feedback pairs. Always unkeyed 64-bit BLAKE2b
+        (PAIR_HASH_ALGORITHM): digests are persisted in the seen-pairs filter,
+        so they must not depend on which optional packages a host has.
+        Returns the 64-bit digest as an int, which is smaller and cheaper to
+        hash in the seen set than a hex string.
         """
-        return f"{pair.analysis_hash}_{pair.recommendation_id}_{pair.feedback_timestamp}"
+        key = f"{pair.analysis_hash}|{pair.recommendation_id}|{pair.feedback_timestamp}".encode()
+        return int.from_bytes(blake2b(key, digest_size=8).digest(), "little")
     
     def _hash_id(self, id_value: int) -> str:
         """
         Hash an ID for anonymization.
         
-        Converts numeric ID to hash string while maintaining determinism
-        (same ID always produces same hash within a session).
+        Converts numeric ID to a keyed BLAKE2b hash (16 hex chars) while
+        maintaining determinism (same ID and salt always produce same hash).
         """
-        import hashlib
-        # Use a salt for additional privacy
-        salt = "haski_feedback_anonymization"
-        hash_input = f"{salt}_{id_value}".encode()
-        hash_obj = hashlib.sha256(hash_input)
-        return hash_obj.hexdigest()[:16]
+        return _hash_id(id_value, self._salt)
+    
+    def _hash_ids(self, id_values: Iterable[int]) -> List[str]:
+        """
+        Hash many IDs in one pass.
+        
+        Equivalent to [self._hash_id(i) for i in id_values], but each
+        distinct ID is hashed once and the rest is a dict lookup.
+        """
+        id_values = list(id_values)
+        salt = self._salt
+        hashes = {i: _hash_id(i, salt) for i in set(id_values)}
+        return [hashes[i] for i in id_values]
+    
+    # Age bucket boundaries: label i covers [_AGE_BINS[i-1], _AGE_BINS[i])
+    _AGE_BINS = (18, 25, 35, 50)
+    _AGE_LABELS = ("<18", "18-25", "25-35", "35-50", "50+")
+    
+    @classmethod
+    def _age_range_column(cls):
+        """SQL CASE expression bucketing Profile.age with the same bins as _bucket_age."""
+        whens = [(Profile.age.is_(None), None)]
+        whens += [(Profile.age < upper, label) for upper, label in zip(cls._AGE_BINS, cls._AGE_LABELS)]
+        return case(*whens, else_=cls._AGE_LABELS[-1]).label("age_range")
     
     def _bucket_age(self, age: Optional[int]) -> Optional[str]:
         """
@@ -349,17 +889,16 @@ class FeedbackProcessor:
         """
         if age is None:
             return None
+        return self._AGE_LABELS[bisect_right(self._AGE_BINS, age)]
+    
+    def _bucket_ages(self, ages: Iterable[Optional[int]]) -> List[Optional[str]]:
+        """
+        Bucket a column of ages in one pass.
         
-        if age < 18:
-            return "<18"
-        elif age < 25:
-            return "18-25"
-        elif age < 35:
-            return "25-35"
-        elif age < 50:
-            return "35-50"
-        else:
-            return "50+"
+        Equivalent to [self._bucket_age(a) for a in ages].
+        """
+        bins, labels = self._AGE_BINS, self._AGE_LABELS
+        return [None if age is None else labels[bisect_right(bins, age)] for age in ages]
     
     def export_aggregate_stats(self) -> Dict:
         """
@@ -375,7 +914,8 @@ class FeedbackProcessor:
             "skipped_records": self.stats.skipped_records,
             "errors": self.stats.errors,
             "execution_time_seconds": self.stats.execution_time_seconds,
-            "export_filename": self.stats.export_filename
+            "export_filename": self.stats.export_filename,
+            "parquet_filename": self.stats.parquet_filename
         }
 
 
@@ -414,7 +954,8 @@ def run_daily_feedback_export(output_dir: str = "ml/feedback_training/") -> Feed
     """
     Run feedback export task (called by scheduler).
     
-    Exports feedback from last 24 hours.
+    Exports feedback from last 24 hours, skipping pairs exported by
+    previous daily runs.
     
     Returns:
         FeedbackProcessingStats with results
@@ -422,7 +963,7 @@ def run_daily_feedback_export(output_dir: str = "ml/feedback_training/") -> Feed
     logger.info("Running scheduled feedback export...")
     
     try:
-        processor = FeedbackProcessor(output_dir=output_dir)
+        processor = FeedbackProcessor(output_dir=output_dir, persist_seen=True)
         stats = processor.process_and_export(
             days_back=1,  # Last 24 hours
             min_feedback_fields=1
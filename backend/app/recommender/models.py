@@ -5,9 +5,12 @@ Models:
 - Product: Skincare/haircare products with ingredients and tags
 - RuleLog: Log of rules applied during recommendation
 - RecommendationRecord: Store generated recommendations with metadata
+
+Helpers:
+- products_by_tag: Products whose tags array contains a tag, filtered in SQL
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, JSON, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, JSON, DateTime, ForeignKey, Text, cast, select
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -93,6 +96,24 @@ class Product(Base):
         }
 
 
+def products_by_tag(session, tag: str):
+    """
+    Get products whose JSON tags array contains the given tag.
+    
+    The membership test runs in the database instead of loading every
+    product: PostgreSQL uses JSONB containment (indexable with a GIN index
+    on tags), other backends use the SQLite JSON1 json_each table function.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import JSONB
+        has_tag = cast(Product.tags, JSONB).contains([tag])
+    else:
+        tag_values = func.json_each(Product.tags).table_valued("value")
+        has_tag = select(1).select_from(tag_values).where(tag_values.c.value == tag).exists()
+    
+    return session.execute(select(Product).where(has_tag)).scalars().all()
+
+
 class RuleLog(Base):
     """
     Log of Rules Applied During Recommendation Generation
@@ -34,18 +34,54 @@ TODO: Replace rule-based ranking with ML model (contextual bandit approach):
     - A/B test model performance vs rule-based baseline
 """
 
+import heapq
+import itertools
 import logging
-from typing import Dict, List, Optional, Tuple, Any
+import re
+from operator import itemgetter
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple, Any
 from dataclasses import dataclass
+from functools import cached_property, lru_cache
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - scalar scoring still works
+    np = None
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+# Comma separator plus surrounding whitespace in an allergies string
+_ALLERGY_SPLIT_RE = re.compile(r"\s*,\s*")
+
+# Condition name -> bit index, assigned on first sight. Condition sets become
+# int bitsets so matching is one AND + popcount instead of set building
+CONDITION_VOCAB: Dict[str, int] = {}
+_next_condition_bit = itertools.count()
+
+
+def _condition_mask(conditions: Iterable[str]) -> int:
+    """Bitset of the given condition names"""
+    mask = 0
+    for condition in conditions:
+        bit = CONDITION_VOCAB.get(condition)
+        if bit is None:
+            bit = CONDITION_VOCAB.setdefault(condition, next(_next_condition_bit))
+        mask |= 1 << bit
+    return mask
+
+
+@lru_cache(maxsize=8192)
+def _recommended_for_mask(recommended_for: Tuple[str, ...]) -> int:
+    """Cached bitset of a product's recommended_for list"""
+    return _condition_mask(recommended_for)
+
+
+@dataclass(frozen=True)
 class UserProfile:
-    """User profile for ranking context"""
+    """User profile for ranking context (immutable, so derived sets can be cached)"""
     user_id: int
     allergies: Optional[List[str]] = None
     age: Optional[int] = None
@@ -53,17 +89,28 @@ class UserProfile:
     hair_type: Optional[str] = None
     conditions: Optional[List[str]] = None
     
-    def get_allergies_set(self) -> set:
-        """Get allergies as lowercase set for matching"""
+    @cached_property
+    def _allergies_set(self) -> FrozenSet[str]:
         if not self.allergies:
-            return set()
+            return frozenset()
         
         # Handle both comma-separated strings and lists
         if isinstance(self.allergies, str):
-            return set(a.strip().lower() for a in self.allergies.split(',') if a.strip())
+            tokens = _ALLERGY_SPLIT_RE.split(self.allergies.strip().lower())
+            return frozenset(token for token in tokens if token)
         elif isinstance(self.allergies, list):
-            return set(a.lower() for a in self.allergies if a)
-        return set()
+            return frozenset(a.lower() for a in self.allergies if a)
+        return frozenset()
+    
+    def get_allergies_set(self) -> FrozenSet[str]:
+        """Get allergies as lowercase set for matching (parsed once per profile)"""
+        return self._allergies_set
+    
+    @cached_property
+    def _condition_bits(self) -> Tuple[int, int]:
+        """(bitset over CONDITION_VOCAB, number of distinct conditions), lowercased"""
+        conditions = {c.lower() for c in self.conditions or ()}
+        return _condition_mask(conditions), len(conditions)
 
 
 @dataclass
@@ -98,15 +145,20 @@ class AllergySafetyFilter:
     def filter_safe_products(
         products: List[Any],
         user_allergies: set,
-        strict_mode: bool = False
+        strict_mode: bool = False,
+        first_match_only: bool = False
     ) -> Tuple[List[Any], Dict[int, List[str]]]:
         """
         Filter products by allergen content.
         
+        Checks run from most to least selective (avoid_for, ingredients, tags).
+        
         Args:
             products: List of product objects
             user_allergies: Set of allergens user is allergic to (lowercase)
             strict_mode: If True, exclude products with any potential allergen cross-contact
+            first_match_only: Stop checking a product after the first check that
+                finds a concern (enough when only safe/unsafe matters)
         
         Returns:
             (safe_products, products_with_issues) where products_with_issues maps
@@ -115,30 +167,49 @@ class AllergySafetyFilter:
         safe_products = []
         products_with_issues = {}
         
+        if not user_allergies:
+            return list(products), products_with_issues
+        
+        allergens = tuple(user_allergies)
+        # Joined on a separator no name contains, so "x in blob" is a single
+        # C-level scan that is True iff x is a substring of one of the parts
+        allergen_blob = '\x00'.join(allergens)
+        
         for product in products:
-            allergies_found = []
-            
-            # Check main ingredients
-            ingredients = product.ingredients or []
-            for ingredient in ingredients:
-                ingredient_lower = ingredient.lower()
-                for allergen in user_allergies:
-                    if allergen in ingredient_lower or ingredient_lower in allergen:
-                        allergies_found.append(f"Ingredient: {ingredient}")
-            
-            # Check tags for allergen warnings
-            tags = product.tags or []
-            tag_str = ' '.join(tags).lower()
-            for allergen in user_allergies:
-                if allergen in tag_str:
-                    allergies_found.append(f"Tagged: {allergen}")
-            
             # Check avoid_for conditions
-            avoid_for = product.avoid_for or []
-            avoid_str = ' '.join(avoid_for).lower()
-            for allergen in user_allergies:
-                if allergen in avoid_str:
-                    allergies_found.append(f"Avoid recommendation: {allergen}")
+            avoid_str = ' '.join(product.avoid_for or []).lower()
+            allergies_found = [
+                f"Avoid recommendation: {allergen}"
+                for allergen in allergens
+                if allergen in avoid_str
+            ]
+            
+            if not (first_match_only and allergies_found):
+                ingredients = product.ingredients or []
+                ingredients_lower = [ingredient.lower() for ingredient in ingredients]
+                ingredient_blob = '\x00'.join(ingredients_lower)
+                tag_str = ' '.join(product.tags or []).lower()
+                
+                # Fast path for the common no-match case: one scan per allergen
+                # over ingredients and tags together, plus the reverse
+                # ingredient-in-allergen scan, before any per-field work
+                reverse_hit = any(
+                    ingredient_lower in allergen_blob for ingredient_lower in ingredients_lower
+                )
+                combined = f"{ingredient_blob}\x00{tag_str}"
+                if reverse_hit or any(allergen in combined for allergen in allergens):
+                    # Check main ingredients (substring match in either direction)
+                    if reverse_hit or any(allergen in ingredient_blob for allergen in allergens):
+                        for ingredient, ingredient_lower in zip(ingredients, ingredients_lower):
+                            for allergen in allergens:
+                                if allergen in ingredient_lower or ingredient_lower in allergen:
+                                    allergies_found.append(f"Ingredient: {ingredient}")
+                    
+                    # Check tags for allergen warnings
+                    if not (first_match_only and allergies_found):
+                        for allergen in allergens:
+                            if allergen in tag_str:
+                                allergies_found.append(f"Tagged: {allergen}")
             
             if allergies_found:
                 products_with_issues[product.id] = allergies_found
@@ -152,10 +223,62 @@ class AllergySafetyFilter:
     @staticmethod
     def has_allergen_concern(product: Any, user_allergies: set) -> bool:
         """Check if product has any allergen concerns for user"""
-        allergies = AllergySafetyFilter.filter_safe_products([product], user_allergies)[1]
+        allergies = AllergySafetyFilter.filter_safe_products(
+            [product], user_allergies, first_match_only=True
+        )[1]
         return product.id in allergies
 
 
+# Scores depend only on a few product attributes, so they are memoized on
+# those values: repeat ranks (and products sharing credentials) hit the cache
+
+@lru_cache(maxsize=8192)
+def _dermatological_safety_score(
+    dermatologically_safe: bool,
+    recommended_count: int,
+    avoid_count: int
+) -> float:
+    """Safety score 0-100 from the attributes score_dermatological_safety reads"""
+    score = 0
+    
+    # Base: dermatologically tested
+    if dermatologically_safe:
+        score += 100
+    else:
+        score += 40
+    
+    # Boost: recommended for conditions (suggests testing)
+    if recommended_count >= 3:
+        score = min(100, score + 20)
+    elif recommended_count > 0:
+        score = min(100, score + 10)
+    
+    # Penalty: avoid_for many conditions (suggests limitations)
+    if avoid_count > 5:
+        score = max(0, score - 20)
+    
+    return score
+
+
+@lru_cache(maxsize=8192)
+def _product_quality_score(avg_rating: Optional[int], review_count: Optional[int]) -> float:
+    """Quality score 0-100 from the attributes score_product_quality reads"""
+    score = 0
+    
+    # Convert rating (0-500 scale, e.g., 450 = 4.5 stars)
+    rating = (avg_rating or 0) / 5.0 if avg_rating else 0
+    
+    # Review count factor (diminishing returns after 100 reviews)
+    review_count = min(review_count or 0, 100)
+    review_factor = min(1.0, review_count / 50.0)  # Plateau at 50 reviews
+    
+    # Combined score
+    if rating > 0:
+        score = rating * 20 * (0.5 + 0.5 * review_factor)
+    
+    return min(100, score)
+
+
 class DermatologicalRanker:
     """Score products based on dermatological credentials"""
     
@@ -174,27 +297,11 @@ class DermatologicalRanker:
         Returns:
             Score 0-100 based on safety credentials
         """
-        score = 0
-        
-        # Base: dermatologically tested
-        if product.dermatologically_safe:
-            score += 100
-        else:
-            score += 40
-        
-        # Boost: recommended for conditions (suggests testing)
-        recommended_for = product.recommended_for or []
-        if len(recommended_for) >= 3:
-            score = min(100, score + 20)
-        elif len(recommended_for) > 0:
-            score = min(100, score + 10)
-        
-        # Penalty: avoid_for many conditions (suggests limitations)
-        avoid_for = product.avoid_for or []
-        if len(avoid_for) > 5:
-            score = max(0, score - 20)
-        
-        return score
+        return _dermatological_safety_score(
+            bool(product.dermatologically_safe),
+            len(product.recommended_for or ()),
+            len(product.avoid_for or ())
+        )
     
     @staticmethod
     def score_product_quality(product: Any) -> float:
@@ -207,20 +314,7 @@ class DermatologicalRanker:
         Returns:
             Score 0-100
         """
-        score = 0
-        
-        # Convert rating (0-500 scale, e.g., 450 = 4.5 stars)
-        rating = (product.avg_rating or 0) / 5.0 if product.avg_rating else 0
-        
-        # Review count factor (diminishing returns after 100 reviews)
-        review_count = min(product.review_count or 0, 100)
-        review_factor = min(1.0, review_count / 50.0)  # Plateau at 50 reviews
-        
-        # Combined score
-        if rating > 0:
-            score = rating * 20 * (0.5 + 0.5 * review_factor)
-        
-        return min(100, score)
+        return _product_quality_score(product.avg_rating, product.review_count)
     
     @staticmethod
     def calculate_total_safety_score(product: Any) -> float:
@@ -347,6 +441,10 @@ class RankerEngine:
     5. Condition Match (25% weight)
     """
     
+    # Below this many candidates the per-product scalar path is cheaper than
+    # building score arrays
+    VECTORIZE_MIN_PRODUCTS = 64
+    
     def __init__(self, db: Session = None):
         """
         Initialize ranker.
@@ -376,7 +474,7 @@ class RankerEngine:
            - Product quality/ratings (30%)
            - Feedback history (20%)
            - Condition match (25%)
-        3. Sort by score and return top k
+        3. Select the top k by score
         
         Args:
             products_list: List of Product objects to rank
@@ -408,28 +506,29 @@ class RankerEngine:
         
         logger.info(f"After allergy filter: {len(safe_products)} safe products")
         
-        # Step 2: Calculate scores for each product
-        scored_products = []
-        for product in safe_products:
-            score = self._calculate_product_score(
-                product,
-                user_profile,
-                user_allergies
+        # Steps 2-3: Score each product and select top k by score (descending)
+        if np is not None and len(safe_products) >= self.VECTORIZE_MIN_PRODUCTS:
+            top_products = self._select_top_k_vectorized(
+                safe_products, user_profile, user_allergies, k
             )
-            
-            # Get allergen warnings if applicable
-            warnings = products_with_issues.get(product.id, []) if include_allergen_warnings else []
-            
-            scored_products.append((product, score, warnings))
-        
-        # Step 3: Sort by score (descending)
-        scored_products.sort(key=lambda x: x[1], reverse=True)
+        else:
+            # Scores are streamed into nlargest's bounded heap, so at most k
+            # scored products are held at once. nlargest is O(n log k) and
+            # equivalent to a stable sort + [:k], so ties keep their input order
+            scored_products = (
+                (product, self._calculate_product_score(product, user_profile, user_allergies))
+                for product in safe_products
+            )
+            top_products = heapq.nlargest(k, scored_products, key=itemgetter(1))
         
         # Step 4: Create RankedProduct objects with rank and reasons
         ranked_results = []
-        for rank, (product, score, warnings) in enumerate(scored_products[:k], 1):
+        for rank, (product, score) in enumerate(top_products, 1):
             reasons = self._get_ranking_reasons(product, user_profile, score)
             
+            # Get allergen warnings if applicable
+            warnings = products_with_issues.get(product.id, []) if include_allergen_warnings else []
+            
             ranked = RankedProduct(
                 product=product,
                 score=score,
@@ -477,30 +576,94 @@ class RankerEngine:
         score += quality_score * 0.30
         
         # Component 3: Feedback History (20%)
-        if self.db:
-            feedback_stats = self.feedback_scorer.get_product_feedback_stats(
-                self.db,
-                product.id,
-                user_profile.user_id
-            )
-            feedback_score = self.feedback_scorer.score_from_feedback(feedback_stats)
-            score += feedback_score * 0.20
-        else:
-            score += 50 * 0.20  # Neutral score if no DB
+        score += self._score_feedback(product, user_profile) * 0.20
         
         # Component 4: Condition Match (25%)
         condition_score = self._score_condition_match(product, user_profile)
         score += condition_score * 0.25
         
         # Penalize products with allergen concerns
-        allergies_found, _ = self.allergy_filter.filter_safe_products(
-            [product], user_allergies
-        )
-        if not allergies_found:
+        if self._allergen_penalty_applies(product, user_allergies):
             score *= 0.9  # 10% penalty for allergen concerns
         
         return min(100, max(0, score))
     
+    def _select_top_k_vectorized(
+        self,
+        products: List[Any],
+        user_profile: UserProfile,
+        user_allergies: set,
+        k: int
+    ) -> List[Tuple[Any, float]]:
+        """
+        Score all products as NumPy columns and select the top k.
+        
+        Same components, weights and float64 arithmetic as
+        _calculate_product_score, so scores are identical; ties keep their
+        input order like the scalar path.
+        
+        Returns:
+            List of (product, score) tuples, best first
+        """
+        if k <= 0:
+            return []
+        
+        n = len(products)
+        derma = np.fromiter(
+            (self.derma_ranker.score_dermatological_safety(p) for p in products), np.float64, n
+        )
+        quality = np.fromiter(
+            (self.derma_ranker.score_product_quality(p) for p in products), np.float64, n
+        )
+        feedback = np.fromiter(
+            (self._score_feedback(p, user_profile) for p in products), np.float64, n
+        )
+        condition = np.fromiter(
+            (self._score_condition_match(p, user_profile) for p in products), np.float64, n
+        )
+        penalized = np.fromiter(
+            (self._allergen_penalty_applies(p, user_allergies) for p in products), bool, n
+        )
+        
+        safety = (
+            derma * DermatologicalRanker.DERMATOLOGICAL_WEIGHT +
+            quality * (DermatologicalRanker.RATING_WEIGHT + DermatologicalRanker.REVIEW_COUNT_WEIGHT)
+        )
+        scores = safety * 0.25 + quality * 0.30 + feedback * 0.20 + condition * 0.25
+        scores[penalized] *= 0.9
+        np.clip(scores, 0, 100, out=scores)
+        
+        # Partition to the k-th best score, keep every candidate tied with it,
+        # then stable-sort that small set so tie order matches the scalar path
+        negated = -scores
+        if k < n:
+            kth = np.partition(negated, k - 1)[k - 1]
+            candidates = np.flatnonzero(negated <= kth)
+        else:
+            candidates = np.arange(n)
+        top = candidates[np.argsort(negated[candidates], kind="stable")][:k]
+        
+        return [(products[i], float(scores[i])) for i in top]
+    
+    def _score_feedback(self, product: Any, user_profile: UserProfile) -> float:
+        """Feedback history score 0-100 (neutral 50 without a DB session)"""
+        if not self.db:
+            return 50
+        
+        feedback_stats = self.feedback_scorer.get_product_feedback_stats(
+            self.db,
+            product.id,
+            user_profile.user_id
+        )
+        return self.feedback_scorer.score_from_feedback(feedback_stats)
+    
+    def _allergen_penalty_applies(self, product: Any, user_allergies: set) -> bool:
+        """Whether the allergen-concern score penalty applies to product"""
+        allergies_found, _ = self.allergy_filter.filter_safe_products(
+            [product], user_allergies, first_match_only=True
+        )
+        return not allergies_found
+    
     def _score_condition_match(
         self,
         product: Any,
@@ -519,18 +682,18 @@ class RankerEngine:
         if not user_profile.conditions:
             return 50  # Neutral if no conditions detected
         
-        recommended_for = set((product.recommended_for or []))
+        recommended_for = product.recommended_for
         if not recommended_for:
             return 40  # Slight penalty if no recommendations
         
-        user_conditions = set(c.lower() for c in user_profile.conditions)
-        matching_conditions = user_conditions.intersection(recommended_for)
+        user_mask, user_condition_count = user_profile._condition_bits
+        matching_count = (user_mask & _recommended_for_mask(tuple(recommended_for))).bit_count()
         
-        if not matching_conditions:
+        if not matching_count:
             return 30  # Lower score if no condition match
         
         # Score based on overlap
-        match_ratio = len(matching_conditions) / len(user_conditions)
+        match_ratio = matching_count / user_condition_count
         
         return min(100, 60 + (match_ratio * 40))
     
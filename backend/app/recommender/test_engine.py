@@ -10,6 +10,10 @@ Test coverage:
 - Data validation
 """
 
+import threading
+import time
+from collections import OrderedDict
+
 import pytest
 from pathlib import Path
 from backend.app.recommender.engine import RuleEngine, AnalysisValidator
@@ -529,6 +533,80 @@ class TestIntegration:
         
         # r004 (Anti-aging) should NOT be applied due to pregnancy
         assert "r004" not in applied_rules
+    
+    def test_apply_rules_cached_by_input(self, monkeypatch):
+        """Test that identical inputs reuse the cached result as an independent copy."""
+        engine = RuleEngine()
+        calls = []
+        evaluate = engine._evaluate_rules
+        monkeypatch.setattr(
+            engine, "_evaluate_rules",
+            lambda *args: calls.append(args) or evaluate(*args)
+        )
+        
+        analysis = {"skin_type": "oily", "conditions_detected": ["acne"]}
+        profile = {"age": 25, "allergies": []}
+        
+        first, first_rules = engine.apply_rules(analysis, profile)
+        first['products'].clear()
+        first_rules.clear()
+        
+        # Same content, different key order: served from cache
+        second, second_rules = engine.apply_rules(
+            {"conditions_detected": ["acne"], "skin_type": "oily"},
+            {"allergies": [], "age": 25}
+        )
+        assert len(calls) == 1
+        assert len(second['products']) > 0, "Caller mutation must not leak into the cache"
+        assert len(second_rules) > 0
+        
+        # Different input: evaluated again
+        engine.apply_rules({"skin_type": "dry"}, profile)
+        assert len(calls) == 2
+    
+    def test_apply_rules_cache_bounded(self, monkeypatch):
+        """Test that the result cache evicts least recently used entries."""
+        engine = RuleEngine()
+        monkeypatch.setattr(engine, "CACHE_SIZE", 2)
+        
+        for age in (20, 30, 40):
+            engine.apply_rules({"skin_type": "oily"}, {"age": age})
+        
+        assert len(engine._cache) == 2
+    
+    def test_apply_rules_cache_thread_safe(self, monkeypatch):
+        """Test that concurrent calls with constant eviction don't corrupt the cache."""
+        engine = RuleEngine()
+        monkeypatch.setattr(engine, "CACHE_SIZE", 2)
+        
+        class SlowLookupCache(OrderedDict):
+            # Yield between the lookup and move_to_end so other threads can evict
+            def get(self, key, default=None):
+                value = super().get(key, default)
+                time.sleep(0.0001)
+                return value
+        
+        engine._cache = SlowLookupCache()
+        errors = []
+        
+        def worker(offset):
+            try:
+                for i in range(50):
+                    recommendation, _ = engine.apply_rules(
+                        {"skin_type": "oily"}, {"age": 20 + (i + offset) % 5}
+                    )
+                    assert "metadata" in recommendation
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert errors == []
+        assert len(engine._cache) <= 2
 
 
 if __name__ == "__main__":
@@ -9,11 +9,13 @@ Tests cover:
 - Integration with recommendations
 """
 
+import sys
 import pytest
 import yaml
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
+from backend.app.recommender import escalation_handler as _eh_mod
 from backend.app.recommender.escalation_handler import (
     EscalationHandler,
     get_escalation_handler,
@@ -356,7 +358,7 @@ class TestEscalationIntegration:
         # Step 2: Find condition name
         condition_name = None
         for cond in escalation_handler.get_all_escalation_conditions():
-            if escalation_handler.conditions[cond] == escalation_data:
+            if escalation_handler.conditions[cond] is escalation_data:
                 condition_name = cond
                 break
         
@@ -378,12 +380,34 @@ class TestEscalationIntegration:
         }
         
         # Should log warning
-        with patch('backend.app.recommender.escalation_handler.logger') as mock_logger:
+        with patch.object(_eh_mod, 'logger') as mock_logger:
             escalation_handler.check_recommendation(recommendation)
             
             # Verify warning was logged
             mock_logger.warning.assert_called_once()
     
+    def test_check_recommendations_batch(self, escalation_handler):
+        """Test batch escalation checks align with per-recommendation checks."""
+        recommendations = [
+            {'conditions_detected': ['acne']},
+            {'conditions_detected': ['acne', 'infection']},
+            {'conditions_detected': None},
+            {'routines': []},
+            {'conditions_detected': ['severe_rash']},
+        ]
+        
+        results = escalation_handler.check_recommendations_batch(recommendations)
+        
+        assert len(results) == len(recommendations)
+        assert results[0] is None
+        assert results[1] is escalation_handler.conditions['infection']
+        assert results[2] is None
+        assert results[3] is None
+        assert results[4] is escalation_handler.conditions['severe_rash']
+        assert results == [
+            escalation_handler.check_recommendation(rec) for rec in recommendations
+        ]
+    
     def test_multiple_recommendations_no_escalation_then_escalation(self, escalation_handler):
         """Test processing multiple recommendations, one with escalation."""
         rec1 = {'conditions_detected': ['acne'], 'routines': []}
@@ -418,10 +442,16 @@ class TestEdgeCases:
             'routines': []
         }
         
-        # Will raise TypeError when iterating None, which is expected behavior
-        # The calling code should ensure conditions_detected is always a list
-        with pytest.raises(TypeError):
-            escalation_handler.check_recommendation(recommendation)
+        escalation = escalation_handler.check_recommendation(recommendation)
+        
+        assert escalation is None
+    
+    def test_condition_names_interned(self, escalation_handler):
+        """Test condition names and categorical fields are interned at load."""
+        for name, data in escalation_handler.conditions.items():
+            assert sys.intern(name) is name
+            assert sys.intern(data['severity']) is data['severity']
+            assert sys.intern(data['urgency']) is data['urgency']
     
     def test_get_all_conditions(self, escalation_handler):
         """Test retrieving all escalation conditions."""
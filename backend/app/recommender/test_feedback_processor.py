@@ -11,13 +11,18 @@ Tests cover:
 """
 
 import pytest
+import calendar
 import csv
+import gzip
+import struct
+from dataclasses import replace
 from datetime import datetime, timedelta
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 
 from backend.app.db.base import Base
 from backend.app.models.db_models import User, Profile, Analysis
@@ -26,22 +31,65 @@ from backend.app.recommender.feedback_processor import (
     FeedbackProcessor,
     FeedbackTrainingPair,
     FeedbackProcessingStats,
+    SeenPairsFilter,
+    _hash_id,
     run_daily_feedback_export,
     run_bulk_feedback_export
 )
 
 
+# Fixed reference time so fixtures don't drift between calls
+_NOW = datetime.utcnow()
+
+
+def open_export(filename):
+    """Open an exported CSV for reading, transparently handling .csv.gz."""
+    if str(filename).endswith(".gz"):
+        return gzip.open(filename, 'rt', newline='')
+    return open(filename, 'r', newline='')
+
+
 # ===== FIXTURES =====
 
-@pytest.fixture
-def test_db():
-    """Create in-memory SQLite database for testing."""
-    engine = create_engine("sqlite:///:memory:")
+@pytest.fixture(scope="session")
+def test_db_engine():
+    """Create the in-memory SQLite schema once for the whole session."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        # Let SQLAlchemy own BEGIN/SAVEPOINT instead of pysqlite's implicit
+        # transactions, and keep the rollback journal in memory
+        dbapi_connection.isolation_level = None
+        dbapi_connection.execute("PRAGMA journal_mode=MEMORY")
+    
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN")
+    
     Base.metadata.create_all(engine)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = SessionLocal()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def test_db(test_db_engine):
+    """Session inside a transaction that is rolled back after each test."""
+    connection = test_db_engine.connect()
+    transaction = connection.begin()
+    db = Session(
+        bind=connection,
+        autoflush=False,
+        join_transaction_mode="create_savepoint"
+    )
     yield db
     db.close()
+    transaction.rollback()
+    connection.close()
 
 
 @pytest.fixture
@@ -129,7 +177,7 @@ def sample_feedback(test_db, sample_user, sample_analysis, sample_recommendation
         timeframe="2_weeks",
         would_recommend=True,
         feedback_text="Great recommendations!",
-        created_at=datetime.utcnow()
+        created_at=_NOW
     )
     test_db.add(feedback)
     test_db.commit()
@@ -142,6 +190,12 @@ def feedback_processor(test_db, temp_output_dir):
     return FeedbackProcessor(db_session=test_db, output_dir=temp_output_dir)
 
 
+@pytest.fixture
+def feedback_processor_nodb(temp_output_dir):
+    """Create feedback processor for tests that never touch the database."""
+    return FeedbackProcessor(db_session=MagicMock(), output_dir=temp_output_dir)
+
+
 # ===== DATA CLASS TESTS =====
 
 class TestFeedbackTrainingPair:
@@ -160,12 +214,15 @@ class TestFeedbackTrainingPair:
             rules_applied="r001,r002",
             timeframe="2_weeks",
             age_range="25-35",
-            feedback_timestamp="2025-10-25T10:00:00",
+            feedback_timestamp=1761386400,  # 2025-10-25T10:00:00Z
             export_date="2025-10-25T12:00:00"
         )
         
         assert pair.analysis_hash == "abc123def456"
         assert pair.helpful_rating == 5
+        assert not hasattr(pair, "__dict__")
+        with pytest.raises(AttributeError):
+            pair.helpful_rating = 1
     
     def test_to_dict(self):
         """Test converting training pair to dictionary."""
@@ -180,7 +237,7 @@ class TestFeedbackTrainingPair:
             rules_applied="r001",
             timeframe="2_weeks",
             age_range="25-35",
-            feedback_timestamp="2025-10-25T10:00:00",
+            feedback_timestamp=1761386400,  # 2025-10-25T10:00:00Z
             export_date="2025-10-25T12:00:00"
         )
         
@@ -196,51 +253,82 @@ class TestFeedbackTrainingPair:
 class TestAnonymization:
     """Test anonymization functions."""
     
-    def test_hash_id_deterministic(self, feedback_processor):
+    def test_hash_id_deterministic(self, feedback_processor_nodb):
         """Test that ID hashing is deterministic."""
-        hash1 = feedback_processor._hash_id(42)
-        hash2 = feedback_processor._hash_id(42)
+        hash1 = feedback_processor_nodb._hash_id(42)
+        hash2 = feedback_processor_nodb._hash_id(42)
         
         assert hash1 == hash2
         assert len(hash1) == 16
     
-    def test_hash_id_different_for_different_ids(self, feedback_processor):
+    def test_hash_id_different_for_different_ids(self, feedback_processor_nodb):
         """Test that different IDs produce different hashes."""
-        hash1 = feedback_processor._hash_id(42)
-        hash2 = feedback_processor._hash_id(43)
+        hash1 = feedback_processor_nodb._hash_id(42)
+        hash2 = feedback_processor_nodb._hash_id(43)
         
         assert hash1 != hash2
     
-    def test_bucket_age_18_to_25(self, feedback_processor):
+    def test_hash_id_cached(self, feedback_processor_nodb):
+        """Test repeated IDs are served from the hash cache."""
+        _hash_id.cache_clear()
+        
+        first = feedback_processor_nodb._hash_id(777)
+        second = feedback_processor_nodb._hash_id(777)
+        
+        assert first == second
+        assert len(second) == 16
+        assert _hash_id.cache_info().hits == 1
+    
+    def test_hash_ids_matches_hash_id(self, feedback_processor_nodb):
+        """Test that batch hashing matches per-ID hashing."""
+        ids = [1, 42, 43, 10**9, 42, 1]
+        
+        assert feedback_processor_nodb._hash_ids(iter(ids)) == [feedback_processor_nodb._hash_id(i) for i in ids]
+    
+    def test_hash_id_depends_on_salt(self, temp_output_dir, monkeypatch):
+        """Test that a different FEEDBACK_SALT produces different hashes."""
+        default = FeedbackProcessor(db_session=MagicMock(), output_dir=temp_output_dir)
+        monkeypatch.setenv("FEEDBACK_SALT", "another_salt")
+        salted = FeedbackProcessor(db_session=MagicMock(), output_dir=temp_output_dir)
+        
+        assert default._hash_id(42) != salted._hash_id(42)
+    
+    def test_bucket_age_18_to_25(self, feedback_processor_nodb):
         """Test age bucketing for 18-25 range."""
-        assert feedback_processor._bucket_age(18) == "18-25"
-        assert feedback_processor._bucket_age(20) == "18-25"
-        assert feedback_processor._bucket_age(24) == "18-25"
+        assert feedback_processor_nodb._bucket_age(18) == "18-25"
+        assert feedback_processor_nodb._bucket_age(20) == "18-25"
+        assert feedback_processor_nodb._bucket_age(24) == "18-25"
     
-    def test_bucket_age_25_to_35(self, feedback_processor):
+    def test_bucket_age_25_to_35(self, feedback_processor_nodb):
         """Test age bucketing for 25-35 range."""
-        assert feedback_processor._bucket_age(25) == "25-35"
-        assert feedback_processor._bucket_age(28) == "25-35"
-        assert feedback_processor._bucket_age(34) == "25-35"
+        assert feedback_processor_nodb._bucket_age(25) == "25-35"
+        assert feedback_processor_nodb._bucket_age(28) == "25-35"
+        assert feedback_processor_nodb._bucket_age(34) == "25-35"
     
-    def test_bucket_age_35_to_50(self, feedback_processor):
+    def test_bucket_age_35_to_50(self, feedback_processor_nodb):
         """Test age bucketing for 35-50 range."""
-        assert feedback_processor._bucket_age(35) == "35-50"
-        assert feedback_processor._bucket_age(40) == "35-50"
-        assert feedback_processor._bucket_age(49) == "35-50"
+        assert feedback_processor_nodb._bucket_age(35) == "35-50"
+        assert feedback_processor_nodb._bucket_age(40) == "35-50"
+        assert feedback_processor_nodb._bucket_age(49) == "35-50"
     
-    def test_bucket_age_50_plus(self, feedback_processor):
+    def test_bucket_age_50_plus(self, feedback_processor_nodb):
         """Test age bucketing for 50+ range."""
-        assert feedback_processor._bucket_age(50) == "50+"
-        assert feedback_processor._bucket_age(65) == "50+"
+        assert feedback_processor_nodb._bucket_age(50) == "50+"
+        assert feedback_processor_nodb._bucket_age(65) == "50+"
     
-    def test_bucket_age_under_18(self, feedback_processor):
+    def test_bucket_age_under_18(self, feedback_processor_nodb):
         """Test age bucketing for under 18."""
-        assert feedback_processor._bucket_age(16) == "<18"
+        assert feedback_processor_nodb._bucket_age(16) == "<18"
     
-    def test_bucket_age_none(self, feedback_processor):
+    def test_bucket_age_none(self, feedback_processor_nodb):
         """Test age bucketing with None."""
-        assert feedback_processor._bucket_age(None) is None
+        assert feedback_processor_nodb._bucket_age(None) is None
+    
+    def test_bucket_ages_matches_bucket_age(self, feedback_processor_nodb):
+        """Test that batch bucketing matches per-age bucketing."""
+        ages = [None, 0, 17, 18, 24, 25, 34, 35, 49, 50, 90]
+        
+        assert feedback_processor_nodb._bucket_ages(ages) == [feedback_processor_nodb._bucket_age(a) for a in ages]
 
 
 # ===== FEEDBACK PROCESSING TESTS =====
@@ -271,6 +359,8 @@ class TestFeedbackProcessing:
         assert pair.would_recommend is True
         assert pair.age_range == "25-35"
         assert "acne" in pair.conditions_detected
+        assert pair.feedback_timestamp == calendar.timegm(sample_feedback.created_at.utctimetuple())
+        assert pair.export_date == feedback_processor._export_date_iso
     
     def test_process_partial_feedback(
         self,
@@ -290,7 +380,7 @@ class TestFeedbackProcessing:
             product_satisfaction=None,
             routine_completion_pct=None,
             would_recommend=None,
-            created_at=datetime.utcnow()
+            created_at=_NOW
         )
         test_db.add(feedback)
         test_db.commit()
@@ -306,6 +396,28 @@ class TestFeedbackProcessing:
         assert pair.helpful_rating == 4
         assert pair.product_satisfaction is None
     
+    def test_conditions_and_rules_joined_canonically(
+        self,
+        feedback_processor,
+        sample_feedback,
+        sample_recommendation,
+        sample_analysis,
+        sample_user
+    ):
+        """Test that condition/rule lists are joined in sorted order."""
+        sample_recommendation.conditions_analyzed = ["oily_skin", "acne"]
+        sample_recommendation.rules_applied = ["r002_treatment", "r001_cleanser"]
+        
+        pair = feedback_processor._process_feedback_record(
+            sample_feedback,
+            sample_recommendation,
+            sample_analysis,
+            sample_user
+        )
+        
+        assert pair.conditions_detected == "acne,oily_skin"
+        assert pair.rules_applied == "r001_cleanser,r002_treatment"
+    
     def test_skip_empty_feedback(
         self,
         feedback_processor,
@@ -324,7 +436,7 @@ class TestFeedbackProcessing:
             product_satisfaction=None,
             routine_completion_pct=None,
             would_recommend=None,
-            created_at=datetime.utcnow()
+            created_at=_NOW
         )
         test_db.add(feedback)
         test_db.commit()
@@ -344,7 +456,7 @@ class TestFeedbackProcessing:
 class TestDeduplication:
     """Test deduplication logic."""
     
-    def test_get_pair_hash(self, feedback_processor):
+    def test_get_pair_hash(self, feedback_processor_nodb):
         """Test pair hash generation."""
         pair = FeedbackTrainingPair(
             analysis_hash="abc123",
@@ -357,17 +469,18 @@ class TestDeduplication:
             rules_applied="r001",
             timeframe="2_weeks",
             age_range="25-35",
-            feedback_timestamp="2025-10-25T10:00:00",
+            feedback_timestamp=1761386400,  # 2025-10-25T10:00:00Z
             export_date="2025-10-25T12:00:00"
         )
         
-        hash1 = feedback_processor._get_pair_hash(pair)
-        hash2 = feedback_processor._get_pair_hash(pair)
+        hash1 = feedback_processor_nodb._get_pair_hash(pair)
+        hash2 = feedback_processor_nodb._get_pair_hash(pair)
         
         assert hash1 == hash2
-        assert isinstance(hash1, str)
+        assert isinstance(hash1, int)
+        assert 0 <= hash1 < 2**64
     
-    def test_duplicate_detection(self, feedback_processor):
+    def test_duplicate_detection(self, feedback_processor_nodb):
         """Test detecting duplicate pairs."""
         pair1 = FeedbackTrainingPair(
             analysis_hash="abc123",
@@ -380,7 +493,7 @@ class TestDeduplication:
             rules_applied="r001",
             timeframe="2_weeks",
             age_range="25-35",
-            feedback_timestamp="2025-10-25T10:00:00",
+            feedback_timestamp=1761386400,  # 2025-10-25T10:00:00Z
             export_date="2025-10-25T12:00:00"
         )
         
@@ -395,14 +508,175 @@ class TestDeduplication:
             rules_applied="r001",
             timeframe="2_weeks",
             age_range="25-35",
-            feedback_timestamp="2025-10-25T10:00:00",
+            feedback_timestamp=1761386400,  # 2025-10-25T10:00:00Z
             export_date="2025-10-25T12:00:00"
         )
         
-        hash1 = feedback_processor._get_pair_hash(pair1)
-        hash2 = feedback_processor._get_pair_hash(pair2)
+        hash1 = feedback_processor_nodb._get_pair_hash(pair1)
+        hash2 = feedback_processor_nodb._get_pair_hash(pair2)
         
         assert hash1 == hash2
+    
+    def test_distinct_pairs_hash_differently(self, feedback_processor_nodb):
+        """Test that pairs for different recommendations are not deduplicated."""
+        pair1 = FeedbackTrainingPair(
+            analysis_hash="abc123",
+            recommendation_id="rec_001",
+            helpful_rating=5,
+            product_satisfaction=4,
+            routine_completion_pct=80,
+            would_recommend=True,
+            conditions_detected="acne",
+            rules_applied="r001",
+            timeframe="2_weeks",
+            age_range="25-35",
+            feedback_timestamp=1761386400,  # 2025-10-25T10:00:00Z
+            export_date="2025-10-25T12:00:00"
+        )
+        pair2 = FeedbackTrainingPair(
+            analysis_hash="abc123",
+            recommendation_id="rec_002",
+            helpful_rating=5,
+            product_satisfaction=4,
+            routine_completion_pct=80,
+            would_recommend=True,
+            conditions_detected="acne",
+            rules_applied="r001",
+            timeframe="2_weeks",
+            age_range="25-35",
+            feedback_timestamp=1761386400,  # 2025-10-25T10:00:00Z
+            export_date="2025-10-25T12:00:00"
+        )
+        
+        assert feedback_processor_nodb._get_pair_hash(pair1) != feedback_processor_nodb._get_pair_hash(pair2)
+    
+    def test_pair_hash_is_pinned(self, feedback_processor_nodb):
+        """Test that dedup digests are 64-bit BLAKE2b regardless of installed packages."""
+        pair = FeedbackTrainingPair(
+            analysis_hash="abc123",
+            recommendation_id="rec_001",
+            helpful_rating=5,
+            product_satisfaction=4,
+            routine_completion_pct=80,
+            would_recommend=True,
+            conditions_detected="acne",
+            rules_applied="r001",
+            timeframe="2_weeks",
+            age_range="25-35",
+            feedback_timestamp=1761386400,  # 2025-10-25T10:00:00Z
+            export_date="2025-10-25T12:00:00"
+        )
+        
+        # Persisted in the seen-pairs filter: changing this value invalidates it
+        assert feedback_processor_nodb._get_pair_hash(pair) == 2550102604753927083
+
+
+    def test_seen_filter_add_and_contains(self):
+        """Test Bloom filter membership for added and unseen digests."""
+        seen = SeenPairsFilter(capacity=1000)
+        digests = [i * 0x9E3779B97F4A7C15 % 2**64 for i in range(1, 501)]
+        for digest in digests:
+            seen.add(digest)
+        
+        assert all(d in seen for d in digests)
+        unseen = [i * 0xC2B2AE3D27D4EB4F % 2**64 for i in range(1, 501)]
+        assert sum(d in seen for d in unseen) < 10
+    
+    def test_seen_filter_round_trip(self, tmp_path):
+        """Test Bloom filter persists to disk."""
+        path = tmp_path / ".seen.bloom"
+        seen = SeenPairsFilter(capacity=100)
+        seen.add(12345)
+        seen.save(path)
+        
+        loaded = SeenPairsFilter.load(path)
+        
+        assert 12345 in loaded
+        assert loaded.num_bits == seen.num_bits
+        assert 12345 not in SeenPairsFilter.load(tmp_path / "missing.bloom")
+    
+    def test_seen_filter_grows_past_capacity(self, tmp_path):
+        """Test that a full filter chains a larger slice instead of saturating."""
+        seen = SeenPairsFilter(capacity=100)
+        digests = [i * 0x9E3779B97F4A7C15 % 2**64 for i in range(1, 1001)]
+        for digest in digests:
+            seen.add(digest)
+        
+        assert len(seen.slices) == 4  # 100 + 200 + 400 + 800 capacity
+        assert all(d in seen for d in digests)
+        unseen = [i * 0xC2B2AE3D27D4EB4F % 2**64 for i in range(1, 1001)]
+        assert sum(d in seen for d in unseen) < 10
+        
+        path = tmp_path / ".seen.bloom"
+        seen.save(path)
+        loaded = SeenPairsFilter.load(path)
+        assert [s.count for s in loaded.slices] == [s.count for s in seen.slices]
+        assert all(d in loaded for d in digests)
+    
+    def test_seen_filter_save_is_atomic(self, tmp_path, monkeypatch):
+        """Test that a failed save leaves the previous filter in place."""
+        path = tmp_path / ".seen.bloom"
+        seen = SeenPairsFilter(capacity=100)
+        seen.add(12345)
+        seen.save(path)
+        before = path.read_bytes()
+        
+        seen.add(67890)
+        monkeypatch.setattr(
+            "backend.app.recommender.feedback_processor.os.replace",
+            MagicMock(side_effect=OSError("disk full"))
+        )
+        with pytest.raises(OSError):
+            seen.save(path)
+        
+        assert path.read_bytes() == before
+    
+    def test_seen_filter_rejects_truncated_file(self, tmp_path):
+        """Test that a truncated filter fails loudly instead of on lookup."""
+        path = tmp_path / ".seen.bloom"
+        seen = SeenPairsFilter(capacity=100)
+        seen.save(path)
+        path.write_bytes(path.read_bytes()[:-10])
+        
+        with pytest.raises(ValueError, match="truncated"):
+            SeenPairsFilter.load(path)
+    
+    def test_seen_filter_replaces_legacy_format(self, tmp_path):
+        """Test that unversioned files, which carry no hash algorithm, start fresh."""
+        path = tmp_path / ".seen.bloom"
+        old = SeenPairsFilter(capacity=100).slices[0]
+        old.add(12345)
+        path.write_bytes(struct.pack("<QI", old.num_bits, old.num_hashes) + old.bits)
+        
+        loaded = SeenPairsFilter.load(path)
+        
+        assert 12345 not in loaded
+        assert len(loaded.slices) == 1
+    
+    def test_seen_filter_replaces_other_hash_algorithm(self, tmp_path, monkeypatch):
+        """Test that a filter written with different pair digests is not reused."""
+        path = tmp_path / ".seen.bloom"
+        monkeypatch.setattr(
+            "backend.app.recommender.feedback_processor.PAIR_HASH_ALGORITHM", "xxh3-64"
+        )
+        seen = SeenPairsFilter(capacity=100)
+        seen.add(12345)
+        seen.save(path)
+        monkeypatch.undo()
+        
+        assert 12345 not in SeenPairsFilter.load(path)
+    
+    def test_persisted_dedup_across_runs(self, test_db, temp_output_dir, sample_feedback):
+        """Test that a second run skips pairs exported by the first."""
+        first = FeedbackProcessor(db_session=test_db, output_dir=temp_output_dir, persist_seen=True)
+        first_stats = first.process_and_export(days_back=1)
+        
+        second = FeedbackProcessor(db_session=test_db, output_dir=temp_output_dir, persist_seen=True)
+        second_stats = second.process_and_export(days_back=1)
+        
+        assert first_stats.exported_records == 1
+        assert second_stats.exported_records == 0
+        assert second_stats.deduplicated_records == 1
 
 
 # ===== CSV EXPORT TESTS =====
@@ -410,7 +684,7 @@ class TestDeduplication:
 class TestCSVExport:
     """Test CSV export functionality."""
     
-    def test_export_to_csv(self, feedback_processor, temp_output_dir):
+    def test_export_to_csv(self, feedback_processor_nodb, temp_output_dir):
         """Test exporting training pairs to CSV."""
         pairs = [
             FeedbackTrainingPair(
@@ -424,17 +698,18 @@ class TestCSVExport:
                 rules_applied="r001",
                 timeframe="2_weeks",
                 age_range="25-35",
-                feedback_timestamp="2025-10-25T10:00:00",
+                feedback_timestamp=1761386400,  # 2025-10-25T10:00:00Z
                 export_date="2025-10-25T12:00:00"
             )
         ]
         
-        filename = feedback_processor._export_to_csv(pairs)
+        filename = feedback_processor_nodb._export_to_csv(pairs)
         
         assert filename
+        assert filename.endswith(".csv.gz")
         assert Path(filename).exists()
     
-    def test_csv_format(self, feedback_processor, temp_output_dir):
+    def test_csv_format(self, feedback_processor_nodb, temp_output_dir):
         """Test CSV file format."""
         pairs = [
             FeedbackTrainingPair(
@@ -448,23 +723,25 @@ class TestCSVExport:
                 rules_applied="r001",
                 timeframe="2_weeks",
                 age_range="25-35",
-                feedback_timestamp="2025-10-25T10:00:00",
+                feedback_timestamp=1761386400,  # 2025-10-25T10:00:00Z
                 export_date="2025-10-25T12:00:00"
             )
         ]
         
-        filename = feedback_processor._export_to_csv(pairs)
+        filename = feedback_processor_nodb._export_to_csv(pairs)
         
         # Read and verify CSV
-        with open(filename, 'r') as f:
+        with open_export(filename) as f:
             reader = csv.DictReader(f)
             rows = list(reader)
         
         assert len(rows) == 1
         assert rows[0]['analysis_hash'] == 'abc123'
         assert rows[0]['helpful_rating'] == '5'
+        assert list(rows[0].keys()) == list(pairs[0].to_dict().keys())
+        assert rows[0] == {k: str(v) for k, v in pairs[0].to_dict().items()}
     
-    def test_csv_contains_no_user_ids(self, feedback_processor, temp_output_dir):
+    def test_csv_contains_no_user_ids(self, feedback_processor_nodb, temp_output_dir):
         """Test that CSV does not contain user IDs."""
         pairs = [
             FeedbackTrainingPair(
@@ -478,23 +755,153 @@ class TestCSVExport:
                 rules_applied="r001",
                 timeframe="2_weeks",
                 age_range="25-35",
-                feedback_timestamp="2025-10-25T10:00:00",
+                feedback_timestamp=1761386400,  # 2025-10-25T10:00:00Z
                 export_date="2025-10-25T12:00:00"
             )
         ]
         
-        filename = feedback_processor._export_to_csv(pairs)
+        filename = feedback_processor_nodb._export_to_csv(pairs)
         
-        with open(filename, 'r') as f:
+        with open_export(filename) as f:
             content = f.read()
         
         assert 'user_id' not in content
     
-    def test_export_empty_list(self, feedback_processor):
+    def test_export_uncompressed(self, temp_output_dir):
+        """Test plain CSV output when compression is disabled."""
+        processor = FeedbackProcessor(db_session=MagicMock(), output_dir=temp_output_dir, compress_csv=False)
+        pairs = [
+            FeedbackTrainingPair(
+                analysis_hash="abc123",
+                recommendation_id="rec_001",
+                helpful_rating=5,
+                product_satisfaction=4,
+                routine_completion_pct=80,
+                would_recommend=True,
+                conditions_detected="acne",
+                rules_applied="r001",
+                timeframe="2_weeks",
+                age_range="25-35",
+                feedback_timestamp=1761386400,  # 2025-10-25T10:00:00Z
+                export_date="2025-10-25T12:00:00"
+            )
+        ]
+        
+        filename = processor._export_to_csv(pairs)
+        
+        assert filename.endswith(".csv")
+        with open(filename, 'r') as f:
+            assert len(list(csv.DictReader(f))) == 1
+    
+    def test_generated_emitter_matches_csv_writer(self, temp_output_dir):
+        """Test the generated row emitter writes the same bytes as csv.writer."""
+        processor = FeedbackProcessor(db_session=MagicMock(), output_dir=temp_output_dir, compress_csv=False)
+        base = FeedbackTrainingPair(
+            analysis_hash="abc123",
+            recommendation_id="rec_001",
+            helpful_rating=5,
+            product_satisfaction=None,
+            routine_completion_pct=0,
+            would_recommend=False,
+            conditions_detected="acne,oily_skin",
+            rules_applied=None,
+            timeframe='say "hi"',
+            age_range="",
+            feedback_timestamp=1761386400,  # 2025-10-25T10:00:00Z
+            export_date="2025-10-25T12:00:00"
+        )
+        pairs = [
+            base,
+            replace(base, would_recommend=None, timeframe="line\nbreak", rules_applied="r\r1"),
+            replace(base, helpful_rating=None, conditions_detected="plain"),
+        ]
+        
+        with open(processor._export_to_csv(pairs), 'rb') as f:
+            generated = f.read()
+        with open(processor._export_to_csv(pairs, use_csv_module=True), 'rb') as f:
+            reference = f.read()
+        
+        assert generated == reference
+    
+    def test_export_empty_list(self, feedback_processor_nodb):
         """Test exporting empty training pairs list."""
-        filename = feedback_processor._export_to_csv([])
+        filename = feedback_processor_nodb._export_to_csv([])
         
         assert filename == ""
+    
+    def test_export_from_generator_across_chunks(self, feedback_processor_nodb):
+        """Test streaming a generator larger than one write chunk."""
+        count = FeedbackProcessor._CSV_CHUNK_ROWS + 5
+        pairs = (
+            FeedbackTrainingPair(
+                analysis_hash=f"hash{i}",
+                recommendation_id=f"rec_{i:04d}",
+                helpful_rating=5,
+                product_satisfaction=4,
+                routine_completion_pct=80,
+                would_recommend=True,
+                conditions_detected="acne",
+                rules_applied="r001",
+                timeframe="2_weeks",
+                age_range="25-35",
+                feedback_timestamp=1761386400,  # 2025-10-25T10:00:00Z
+                export_date="2025-10-25T12:00:00"
+            )
+            for i in range(count)
+        )
+        
+        filename = feedback_processor_nodb._export_to_csv(pairs)
+        
+        with open_export(filename) as f:
+            rows = list(csv.DictReader(f))
+        
+        assert len(rows) == count
+        assert rows[-1]['recommendation_id'] == f"rec_{count - 1:04d}"
+    
+    def test_export_empty_generator(self, feedback_processor_nodb):
+        """Test exporting an empty generator."""
+        filename = feedback_processor_nodb._export_to_csv(iter(()))
+        
+        assert filename == ""
+
+
+# ===== PARQUET EXPORT TESTS =====
+
+class TestParquetExport:
+    """Test Parquet export functionality."""
+    
+    def test_export_to_parquet(self, feedback_processor_nodb):
+        """Test exporting training pairs to typed Parquet columns."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        pairs = [
+            FeedbackTrainingPair(
+                analysis_hash="abc123",
+                recommendation_id="rec_001",
+                helpful_rating=5,
+                product_satisfaction=None,
+                routine_completion_pct=80,
+                would_recommend=True,
+                conditions_detected="acne",
+                rules_applied="r001",
+                timeframe="2_weeks",
+                age_range="25-35",
+                feedback_timestamp=1761386400,  # 2025-10-25T10:00:00Z
+                export_date="2025-10-25T12:00:00"
+            )
+        ]
+        
+        filename = feedback_processor_nodb._export_to_parquet(pairs)
+        table = pq.read_table(filename)
+        
+        assert table.num_rows == 1
+        assert table.column_names == list(pairs[0].to_dict().keys())
+        assert table.to_pylist()[0] == pairs[0].to_dict()
+    
+    def test_export_empty_list(self, feedback_processor_nodb):
+        """Test exporting empty training pairs list."""
+        pytest.importorskip("pyarrow")
+        
+        assert feedback_processor_nodb._export_to_parquet([]) == ""
 
 
 # ===== INTEGRATION TESTS =====
@@ -521,6 +928,95 @@ class TestProcessAndExport:
         assert stats.export_filename
         assert Path(stats.export_filename).exists()
     
+    def test_process_and_export_in_worker_processes(
+        self,
+        feedback_processor,
+        sample_feedback,
+        monkeypatch
+    ):
+        """Test that the process-pool path produces the same export."""
+        monkeypatch.setattr(feedback_processor, "PARALLEL_MIN_ROWS", 0)
+        
+        stats = feedback_processor.process_and_export(days_back=1)
+        
+        with open_export(stats.export_filename) as f:
+            rows = list(csv.DictReader(f))
+        
+        assert stats.exported_records == 1
+        assert rows[0]['analysis_hash'] == feedback_processor._hash_id(sample_feedback.analysis_id)
+        assert rows[0]['age_range'] == "25-35"
+    
+    def test_process_and_export_parquet(
+        self,
+        feedback_processor,
+        sample_feedback
+    ):
+        """Test that Parquet export mirrors the CSV export."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        
+        stats = feedback_processor.process_and_export(days_back=1, export_parquet=True)
+        
+        assert stats.export_filename
+        assert pq.read_table(stats.parquet_filename).num_rows == stats.exported_records
+    
+    def test_query_feedback_single_statement(
+        self,
+        feedback_processor,
+        sample_feedback,
+        test_db
+    ):
+        """Test that feedback, related rows and age buckets load in one query."""
+        statements = []
+        engine = test_db.get_bind()
+        
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append(statement)
+        
+        test_db.expire_all()
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            rows = feedback_processor._query_feedback(_NOW - timedelta(days=1), 1)
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        
+        assert len(statements) == 1
+        assert len(rows) == 1
+        assert rows[0].age_range == "25-35"
+        assert rows[0].conditions == ["acne", "oily_skin"]
+        assert rows[0].recommendation_id == "rec_20251025_001"
+    
+    def test_query_rows_match_orm_path(
+        self,
+        feedback_processor,
+        sample_feedback,
+        sample_recommendation,
+        sample_analysis,
+        sample_user
+    ):
+        """Test that the column query builds the same pair as the ORM path."""
+        rows = feedback_processor._query_feedback(_NOW - timedelta(days=1), 1)
+        
+        from_rows = list(feedback_processor._rows_to_pairs(rows))
+        from_orm = feedback_processor._process_feedback_record(
+            sample_feedback, sample_recommendation, sample_analysis, sample_user
+        )
+        
+        assert len(from_rows) == 1
+        assert replace(from_rows[0], export_date="") == replace(from_orm, export_date="")
+    
+    def test_sql_age_buckets_match_python(self, feedback_processor, test_db):
+        """Test that the SQL CASE bucketing agrees with _bucket_age."""
+        ages = [None, 0, 17, 18, 24, 25, 34, 35, 49, 50, 90]
+        for i, age in enumerate(ages, start=1):
+            test_db.add(User(id=i, username=f"user{i}"))
+            test_db.add(Profile(id=i, user_id=i, age=age))
+        test_db.commit()
+        
+        rows = test_db.query(Profile.age, FeedbackProcessor._age_range_column()).order_by(Profile.id).all()
+        
+        assert [bucket for _, bucket in rows] == [feedback_processor._bucket_age(a) for a in ages]
+    
     def test_statistics_calculation(
         self,
         feedback_processor,
@@ -535,6 +1031,44 @@ class TestProcessAndExport:
         assert stats.execution_time_seconds > 0
         assert stats.exported_records > 0
         assert stats.anonymized_records >= stats.exported_records - stats.deduplicated_records
+    
+    def test_statistics_count_skipped_and_deduplicated(
+        self,
+        feedback_processor,
+        sample_feedback,
+        sample_recommendation,
+        sample_analysis,
+        sample_user,
+        test_db
+    ):
+        """Test skipped and duplicate records are counted."""
+        test_db.add_all([
+            RecommendationFeedback(
+                id=2,
+                user_id=sample_user.id,
+                analysis_id=sample_analysis.id,
+                recommendation_id=sample_recommendation.id,
+                helpful_rating=None,
+                created_at=_NOW
+            ),
+            RecommendationFeedback(
+                id=3,
+                user_id=sample_user.id,
+                analysis_id=sample_analysis.id,
+                recommendation_id=sample_recommendation.id,
+                helpful_rating=3,
+                created_at=sample_feedback.created_at
+            ),
+        ])
+        test_db.commit()
+        
+        stats = feedback_processor.process_and_export(days_back=1)
+        
+        assert stats.total_feedback_records == 3
+        assert stats.exported_records == 1
+        assert stats.anonymized_records == 1
+        assert stats.deduplicated_records == 1
+        assert stats.skipped_records == 1
 
 
 # ===== STATS TESTS =====
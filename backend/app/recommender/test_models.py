@@ -6,14 +6,23 @@ Tests for:
 - RuleLog model
 - RecommendationRecord model
 - RecommendationFeedback model
+
+Tests share one in-memory database per session (per worker under
+pytest-xdist) and each runs in its own rolled-back transaction, so the
+module can be run in parallel:
+
+    pytest backend/app/recommender/test_models.py -n auto --dist=loadfile
 """
 
 import pytest
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import raiseload, selectinload, sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateIndex, CreateTable
 
-from backend.app.db.session import Base
+from backend.app.models.db_models import User, Analysis  # FK targets of the recommender tables
 from backend.app.recommender.models import (
     Product,
     RuleLog,
@@ -21,18 +30,118 @@ from backend.app.recommender.models import (
     RecommendationFeedback
 )
 
+# Fixed reference time keeps expiry dates deterministic
+_NOW = datetime(2025, 10, 24)
+
+# Only the tables under test; the shared Base also carries every app model imported transitively
+_TEST_TABLES = (
+    Product.__table__,
+    RuleLog.__table__,
+    RecommendationRecord.__table__,
+    RecommendationFeedback.__table__,
+)
+
+# DDL for those tables, compiled for SQLite once at import
+_DIALECT = sqlite.dialect()
+_DDL = tuple(
+    str(ddl.compile(dialect=_DIALECT))
+    for table in _TEST_TABLES
+    for ddl in (CreateTable(table), *(CreateIndex(index) for index in table.indexes))
+)
+
+# Sample fixture data, built once rather than per fixture call
+_INGREDIENTS = ("water", "glycerin", "hyaluronic acid", "ceramides")
+_TAGS = ("gentle", "hydrating", "non-comedogenic")
+_RECOMMENDED_FOR = ("dry_skin", "sensitive", "eczema")
+_RECOMMENDATION_CONTENT = {
+    "skincare_routine": [
+        {
+            "step": 1,
+            "action": "Gentle cleanser",
+            "frequency": "2x daily",
+            "why": "Removes excess oil"
+        }
+    ],
+    "products": {
+        "cleanser": {
+            "name": "CeraVe",
+            "price": 8.99
+        }
+    }
+}
+
+# Session factory shared by all tests; each test binds it to its own connection.
+# commit() inside a test only releases a SAVEPOINT; the outer rollback undoes it.
+# Fixtures only flush, and nothing is expired on commit, so asserts on
+# fixture objects read from memory instead of reloading
+_SessionLocal = sessionmaker(
+    join_transaction_mode="create_savepoint",
+    expire_on_commit=False
+)
+
+
+# ===== HELPERS =====
+
+def bulk_add(session, model, rows):
+    """Insert many rows with one executemany instead of per-object adds"""
+    session.execute(insert(model), rows)
+    session.commit()
+
+
+def make_feedback(recommendation, **overrides):
+    """Build a RecommendationFeedback for the given recommendation with default ids"""
+    return RecommendationFeedback(
+        user_id=1,
+        analysis_id=1,
+        recommendation_id=recommendation.id,
+        **overrides
+    )
+
 
 # ===== FIXTURES =====
 
+@pytest.fixture(scope="session")
+def db_engine():
+    """Create the in-memory SQLite database and schema once per test session"""
+    # StaticPool: every checkout shares the one connection holding the schema
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        # Let SQLAlchemy emit BEGIN/SAVEPOINT itself so nested rollbacks work
+        dbapi_connection.isolation_level = None
+        # Nothing here needs to survive the process: skip durability work
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+    
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN")
+    
+    with engine.begin() as connection:
+        for statement in _DDL:
+            connection.exec_driver_sql(statement)
+    yield engine
+    engine.dispose()
+
+
 @pytest.fixture
-def db_session():
-    """Create in-memory SQLite database for testing"""
-    engine = create_engine("sqlite:///:memory:")
-    Base.metadata.create_all(engine)
-    Session = sessionmaker(bind=engine)
-    session = Session()
+def db_session(db_engine):
+    """Session joined to an outer transaction that is rolled back after each test"""
+    connection = db_engine.connect()
+    transaction = connection.begin()
+    session = _SessionLocal(bind=connection)
     yield session
     session.close()
+    transaction.rollback()
+    connection.close()
 
 
 @pytest.fixture
@@ -44,10 +153,10 @@ def sample_product(db_session):
         category="cleanser",
         price_usd=899,  # $8.99
         url="https://example.com/product",
-        ingredients=["water", "glycerin", "hyaluronic acid", "ceramides"],
-        tags=["gentle", "hydrating", "non-comedogenic"],
+        ingredients=list(_INGREDIENTS),
+        tags=list(_TAGS),
         dermatologically_safe=True,
-        recommended_for=["dry_skin", "sensitive", "eczema"],
+        recommended_for=list(_RECOMMENDED_FOR),
         avoid_for=[],
         avg_rating=450,  # 4.5 stars
         review_count=2340,
@@ -55,7 +164,7 @@ def sample_product(db_session):
         external_id="cerave_123"
     )
     db_session.add(product)
-    db_session.commit()
+    db_session.flush()
     return product
 
 
@@ -79,7 +188,7 @@ def sample_rule_log(db_session, sample_product):
         }
     )
     db_session.add(rule_log)
-    db_session.commit()
+    db_session.flush()
     return rule_log
 
 
@@ -90,32 +199,17 @@ def sample_recommendation(db_session):
         user_id=1,
         analysis_id=1,
         recommendation_id="rec_20251024_001",
-        content={
-            "skincare_routine": [
-                {
-                    "step": 1,
-                    "action": "Gentle cleanser",
-                    "frequency": "2x daily",
-                    "why": "Removes excess oil"
-                }
-            ],
-            "products": {
-                "cleanser": {
-                    "name": "CeraVe",
-                    "price": 8.99
-                }
-            }
-        },
+        content=_RECOMMENDATION_CONTENT,  # read-only in these tests
         source="rule_v1",
         conditions_analyzed=["acne", "blackheads"],
         rules_applied=["acne_routine_step_1", "acne_routine_step_2"],
         generation_time_ms=450,
         user_budget="medium",
         user_allergies=["fragrance"],
-        expires_at=datetime.utcnow() + timedelta(days=30)
+        expires_at=_NOW + timedelta(days=30)
     )
     db_session.add(recommendation)
-    db_session.commit()
+    db_session.flush()
     return recommendation
 
 
@@ -168,9 +262,9 @@ class TestProductModel:
         )
         db_session.add(product)
         db_session.commit()
+        db_session.refresh(product)
         
-        retrieved = db_session.query(Product).first()
-        assert retrieved.to_dict()["price_usd"] == 10.50
+        assert product.to_dict()["price_usd"] == 10.50
 
 
 # ===== RULE LOG MODEL TESTS =====
@@ -203,11 +297,10 @@ class TestRuleLogModel:
             reason_not_applied="Condition severity is mild"
         )
         db_session.add(rule_log)
-        db_session.commit()
+        db_session.flush()
         
-        retrieved = db_session.query(RuleLog).first()
-        assert retrieved.applied == False
-        assert "mild" in retrieved.reason_not_applied
+        assert rule_log.applied is False
+        assert "mild" in rule_log.reason_not_applied
     
     def test_rule_log_to_dict(self, sample_rule_log):
         """Test rule log to_dict conversion"""
@@ -246,7 +339,7 @@ class TestRecommendationRecordModel:
     
     def test_recommendation_expiration(self, db_session):
         """Test recommendation expiration date"""
-        future_date = datetime.utcnow() + timedelta(days=30)
+        future_date = _NOW + timedelta(days=30)
         recommendation = RecommendationRecord(
             user_id=1,
             analysis_id=1,
@@ -257,7 +350,7 @@ class TestRecommendationRecordModel:
         db_session.add(recommendation)
         db_session.commit()
         
-        assert recommendation.expires_at > datetime.utcnow()
+        assert recommendation.expires_at > _NOW
     
     def test_recommendation_to_dict(self, sample_recommendation):
         """Test recommendation to_dict conversion"""
@@ -288,10 +381,8 @@ class TestRecommendationFeedbackModel:
     
     def test_create_feedback(self, db_session, sample_recommendation):
         """Test creating feedback record"""
-        feedback = RecommendationFeedback(
-            user_id=1,
-            analysis_id=1,
-            recommendation_id=sample_recommendation.id,
+        feedback = make_feedback(
+            sample_recommendation,
             helpful_rating=4,
             product_satisfaction=4,
             routine_completion_pct=75,
@@ -304,20 +395,20 @@ class TestRecommendationFeedbackModel:
         assert feedback.helpful_rating == 4
         assert feedback.created_at is not None
     
-    def test_feedback_ratings_validation(self, db_session, sample_recommendation):
+    @pytest.mark.parametrize("rating", [1, 2, 3, 4, 5])
+    def test_feedback_ratings_validation(self, db_session, sample_recommendation, rating):
         """Test feedback with various ratings"""
-        for rating in [1, 2, 3, 4, 5]:
-            feedback = RecommendationFeedback(
-                user_id=1,
-                analysis_id=1,
-                recommendation_id=sample_recommendation.id,
-                helpful_rating=rating
-            )
-            db_session.add(feedback)
+        bulk_add(db_session, RecommendationFeedback, [
+            {
+                "user_id": 1,
+                "analysis_id": 1,
+                "recommendation_id": sample_recommendation.id,
+                "helpful_rating": rating
+            }
+        ])
         
-        db_session.commit()
-        feedbacks = db_session.query(RecommendationFeedback).all()
-        assert len(feedbacks) == 5
+        retrieved = db_session.query(RecommendationFeedback).one()
+        assert retrieved.helpful_rating == rating
     
     def test_feedback_product_ratings(self, db_session, sample_recommendation):
         """Test feedback with individual product ratings"""
@@ -326,24 +417,20 @@ class TestRecommendationFeedbackModel:
             "treatment": 4,
             "moisturizer": 5
         }
-        feedback = RecommendationFeedback(
-            user_id=1,
-            analysis_id=1,
-            recommendation_id=sample_recommendation.id,
+        feedback = make_feedback(
+            sample_recommendation,
             product_ratings=product_ratings
         )
         db_session.add(feedback)
-        db_session.commit()
+        db_session.flush()
         
-        retrieved = db_session.query(RecommendationFeedback).first()
-        assert retrieved.product_ratings["cleanser"] == 5
+        assert feedback.id is not None
+        assert feedback.product_ratings["cleanser"] == 5
     
     def test_feedback_to_dict(self, db_session, sample_recommendation):
         """Test feedback to_dict conversion"""
-        feedback = RecommendationFeedback(
-            user_id=1,
-            analysis_id=1,
-            recommendation_id=sample_recommendation.id,
+        feedback = make_feedback(
+            sample_recommendation,
             helpful_rating=4,
             product_satisfaction=4,
             routine_completion_pct=75,
@@ -360,18 +447,24 @@ class TestRecommendationFeedbackModel:
     
     def test_feedback_repr(self, db_session, sample_recommendation):
         """Test feedback string representation"""
-        feedback = RecommendationFeedback(
-            user_id=1,
-            analysis_id=1,
-            recommendation_id=sample_recommendation.id,
+        feedback = make_feedback(
+            sample_recommendation,
             helpful_rating=4,
             product_satisfaction=4
         )
         db_session.add(feedback)
         db_session.commit()
         
+        statements = []
+        event.listen(
+            db_session.connection(),
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement)
+        )
+        
         assert "helpful=4" in repr(feedback)
         assert "satisfaction=4" in repr(feedback)
+        assert statements == []  # attributes survive commit, repr stays in memory
 
 
 # ===== INTEGRATION TESTS =====
@@ -381,37 +474,53 @@ class TestModelIntegration:
     
     def test_product_rule_log_relationship(self, db_session, sample_product, sample_rule_log):
         """Test relationship between Product and RuleLog"""
-        assert len(sample_product.rule_logs) == 1
-        assert sample_product.rule_logs[0].rule_id == "acne_routine_step_1"
+        product = (
+            db_session.query(Product)
+            .options(selectinload(Product.rule_logs), raiseload("*"))
+            .filter_by(id=sample_product.id)
+            .one()
+        )
+        
+        assert len(product.rule_logs) == 1
+        assert product.rule_logs[0].rule_id == "acne_routine_step_1"
     
     def test_recommendation_feedback_relationship(self, db_session, sample_recommendation):
         """Test relationship between Recommendation and Feedback"""
-        feedback = RecommendationFeedback(
-            user_id=1,
-            analysis_id=1,
-            recommendation_id=sample_recommendation.id,
+        feedback = make_feedback(
+            sample_recommendation,
             helpful_rating=5
         )
         db_session.add(feedback)
         db_session.commit()
         
-        assert len(sample_recommendation.feedbacks) == 1
-        assert sample_recommendation.feedbacks[0].helpful_rating == 5
+        recommendation = (
+            db_session.query(RecommendationRecord)
+            .options(selectinload(RecommendationRecord.feedbacks), raiseload("*"))
+            .filter_by(id=sample_recommendation.id)
+            .one()
+        )
+        assert len(recommendation.feedbacks) == 1
+        assert recommendation.feedbacks[0].helpful_rating == 5
     
     def test_multiple_feedbacks_for_recommendation(self, db_session, sample_recommendation):
         """Test multiple feedbacks for single recommendation"""
-        for i in range(3):
-            feedback = RecommendationFeedback(
-                user_id=i+1,
-                analysis_id=i+1,
-                recommendation_id=sample_recommendation.id,
-                helpful_rating=4+i
-            )
-            db_session.add(feedback)
-        
-        db_session.commit()
+        bulk_add(db_session, RecommendationFeedback, [
+            {
+                "user_id": i+1,
+                "analysis_id": i+1,
+                "recommendation_id": sample_recommendation.id,
+                "helpful_rating": 4+i
+            }
+            for i in range(3)
+        ])
         
-        assert len(sample_recommendation.feedbacks) == 3
+        recommendation = (
+            db_session.query(RecommendationRecord)
+            .options(selectinload(RecommendationRecord.feedbacks), raiseload("*"))
+            .filter_by(id=sample_recommendation.id)
+            .one()
+        )
+        assert len(recommendation.feedbacks) == 3
 
 
 if __name__ == "__main__":
@@ -10,14 +10,19 @@ Test Coverage:
 - Edge cases: Empty lists, no allergies, perfect products, etc.
 
 Run with: pytest test_ranker.py -v
+Fixtures are session-scoped (read-only); see conftest.py for parallel runs.
 """
 
+import heapq
 import pytest
+import random
+import sys
 from dataclasses import dataclass
 from typing import List, Optional, Dict, Any
 from unittest.mock import Mock, MagicMock, patch
 
 # Import the ranker module
+from backend.app.recommender import ranker as ranker_module
 from backend.app.recommender.ranker import (
     UserProfile,
     RankedProduct,
@@ -26,45 +31,40 @@ from backend.app.recommender.ranker import (
     FeedbackScorer,
     RankerEngine,
     rank_products,
+    _dermatological_safety_score,
 )
 
 
 # ===== MOCK PRODUCT CLASS =====
 
+@dataclass(slots=True)
 class MockProduct:
-    """Mock Product for testing"""
-    
-    def __init__(
-        self,
-        id: int,
-        name: str,
-        brand: str,
-        category: str = "moisturizer",
-        price_usd: int = 2500,
-        ingredients: Optional[List[str]] = None,
-        tags: Optional[List[str]] = None,
-        dermatologically_safe: bool = True,
-        recommended_for: Optional[List[str]] = None,
-        avoid_for: Optional[List[str]] = None,
-        avg_rating: int = 400,
-        review_count: int = 100
-    ):
-        self.id = id
-        self.name = name
-        self.brand = brand
-        self.category = category
-        self.price_usd = price_usd
-        self.ingredients = ingredients or []
-        self.tags = tags or []
-        self.dermatologically_safe = dermatologically_safe
-        self.recommended_for = recommended_for or []
-        self.avoid_for = avoid_for or []
-        self.avg_rating = avg_rating
-        self.review_count = review_count
-        self.url = "https://example.com"
-        self.external_id = f"test_{id}"
-        self.created_at = None
-        self.updated_at = None
+    """Mock Product for testing (slotted: no per-instance __dict__)"""
+    
+    id: int
+    name: str
+    brand: str
+    category: str = "moisturizer"
+    price_usd: int = 2500
+    ingredients: Optional[List[str]] = None
+    tags: Optional[List[str]] = None
+    dermatologically_safe: bool = True
+    recommended_for: Optional[List[str]] = None
+    avoid_for: Optional[List[str]] = None
+    avg_rating: int = 400
+    review_count: int = 100
+    url: str = "https://example.com"
+    external_id: Optional[str] = None
+    created_at: Any = None
+    updated_at: Any = None
+    
+    def __post_init__(self):
+        self.ingredients = self.ingredients or []
+        self.tags = self.tags or []
+        self.recommended_for = self.recommended_for or []
+        self.avoid_for = self.avoid_for or []
+        if self.external_id is None:
+            self.external_id = f"test_{self.id}"
     
     def to_dict(self):
         return {
@@ -84,7 +84,7 @@ class MockProduct:
 
 # ===== TEST FIXTURES =====
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_products():
     """Create sample products for testing"""
     return [
@@ -139,7 +139,28 @@ def sample_products():
     ]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def large_product_set():
+    """Generate 10k products with overlapping ingredient/tag vocabularies"""
+    rng = random.Random(42)
+    ingredients = ["water", "glycerin", "fragrance", "fragrance_oil", "salicylic_acid",
+                   "benzoyl_peroxide", "retinol", "niacinamide", "lanolin", "zinc_oxide"]
+    tags = ["gentle", "fragrance-free", "acne-fighting", "hydrating", "nut-free", "mineral"]
+    conditions = ["sensitive", "pregnancy", "acne", "dry_skin", "nut_allergy"]
+    return [
+        MockProduct(
+            id=i,
+            name=f"Product {i}",
+            brand="Brand",
+            ingredients=rng.sample(ingredients, rng.randint(0, 5)),
+            tags=rng.sample(tags, rng.randint(0, 3)),
+            avoid_for=rng.sample(conditions, rng.randint(0, 2))
+        )
+        for i in range(10_000)
+    ]
+
+
+@pytest.fixture(scope="session")
 def user_profile_basic():
     """Create basic user profile"""
     return UserProfile(
@@ -151,7 +172,7 @@ def user_profile_basic():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def user_profile_with_allergies():
     """Create user profile with allergies"""
     return UserProfile(
@@ -163,6 +184,23 @@ def user_profile_with_allergies():
     )
 
 
+# ===== TESTS: MockProduct =====
+
+class TestMockProduct:
+    """Test the slotted MockProduct used by these tests"""
+    
+    def test_mock_product_is_slotted(self):
+        """Test MockProduct stores fields in slots rather than a __dict__"""
+        product = MockProduct(id=1, name="P", brand="B", ingredients=None)
+        
+        assert not hasattr(product, "__dict__")
+        assert product.ingredients == []
+        assert product.external_id == "test_1"
+        assert sys.getsizeof(product) < sys.getsizeof(
+            {name: getattr(product, name) for name in MockProduct.__slots__}
+        )
+
+
 # ===== TESTS: UserProfile =====
 
 class TestUserProfile:
@@ -180,6 +218,7 @@ class TestUserProfile:
         assert "salicylic_acid" in allergies
         assert "fragrance" in allergies
         assert len(allergies) == 3
+        assert profile.get_allergies_set() is allergies  # parsed once, then cached
     
     def test_allergies_as_list(self):
         """Test allergies as list"""
@@ -191,6 +230,22 @@ class TestUserProfile:
         
         assert "benzoyl_peroxide" in allergies
         assert "salicylic_acid" in allergies
+        assert profile.get_allergies_set() is allergies
+    
+    def test_allergies_parsed_once(self):
+        """Test the allergies string is split once per profile, not per call"""
+        profile = UserProfile(
+            user_id=1,
+            allergies=" Fragrance Oil ,, benzoyl_peroxide,"
+        )
+        split_re = MagicMock(wraps=ranker_module._ALLERGY_SPLIT_RE)
+        
+        with patch.object(ranker_module, "_ALLERGY_SPLIT_RE", split_re):
+            for _ in range(3):
+                allergies = profile.get_allergies_set()
+        
+        assert allergies == {"fragrance oil", "benzoyl_peroxide"}
+        assert split_re.split.call_count == 1
     
     def test_no_allergies(self):
         """Test profile with no allergies"""
@@ -198,7 +253,7 @@ class TestUserProfile:
         allergies = profile.get_allergies_set()
         
         assert len(allergies) == 0
-        assert isinstance(allergies, set)
+        assert isinstance(allergies, frozenset)
     
     def test_allergies_case_insensitive(self):
         """Test that allergies are normalized to lowercase"""
@@ -210,10 +265,28 @@ class TestUserProfile:
         
         assert "benzoyl_peroxide" in allergies
         assert "salicylic_acid" in allergies
+        assert profile.get_allergies_set() is allergies
 
 
 # ===== TESTS: AllergySafetyFilter =====
 
+def reference_filter_issues(products, user_allergies):
+    """Straightforward per-ingredient/per-allergen scan the filter must agree with"""
+    issues = {}
+    for product in products:
+        avoid_str = ' '.join(product.avoid_for or []).lower()
+        found = [f"Avoid recommendation: {a}" for a in user_allergies if a in avoid_str]
+        for ingredient in product.ingredients or []:
+            for allergen in user_allergies:
+                if allergen in ingredient.lower() or ingredient.lower() in allergen:
+                    found.append(f"Ingredient: {ingredient}")
+        tag_str = ' '.join(product.tags or []).lower()
+        found += [f"Tagged: {a}" for a in user_allergies if a in tag_str]
+        if found:
+            issues[product.id] = found
+    return issues
+
+
 class TestAllergySafetyFilter:
     """Test allergen filtering"""
     
@@ -262,6 +335,56 @@ class TestAllergySafetyFilter:
         # Product 2 should be avoided for sensitive
         assert sample_products[1].id in issues
     
+    @pytest.mark.parametrize("allergies", [
+        {"fragrance"},
+        {"salicylic_acid", "nut"},
+        {"benzoyl_peroxide_wash", "lanolin", "sensitive"},
+    ])
+    def test_filter_matches_reference_on_large_set(self, large_product_set, allergies):
+        """Test the fast-reject filter flags exactly what a full scan flags"""
+        safe, issues = AllergySafetyFilter.filter_safe_products(large_product_set, allergies)
+        
+        assert issues == reference_filter_issues(large_product_set, allergies)
+        assert len(safe) == len(large_product_set)
+    
+    @pytest.mark.parametrize("allergies", [
+        {"benzoyl_peroxide"},
+        {"glycerin", "sensitive"},
+        {"nut", "latex"},
+        {"acne-fighting exfoliating"},  # spans two tags
+    ])
+    def test_fast_path_matches_reference(self, sample_products, allergies):
+        """Test the combined no-match fast path agrees with a per-field scan"""
+        _, issues = AllergySafetyFilter.filter_safe_products(sample_products, allergies)
+        
+        assert issues == reference_filter_issues(sample_products, allergies)
+    
+    def test_filter_short_circuits(self, sample_products):
+        """Test first_match_only skips later checks once avoid_for matched"""
+        class ExplodingList(list):
+            def __iter__(self):
+                raise AssertionError("tags should not be scanned")
+        
+        source = sample_products[1]  # avoid_for=["sensitive"]
+        # Copy: sample_products is shared across the session
+        product = MockProduct(
+            id=source.id,
+            name=source.name,
+            brand=source.brand,
+            ingredients=source.ingredients,
+            tags=ExplodingList(source.tags),
+            avoid_for=source.avoid_for
+        )
+        
+        safe, issues = AllergySafetyFilter.filter_safe_products(
+            [product],
+            {"sensitive"},
+            first_match_only=True
+        )
+        
+        assert issues == {product.id: ["Avoid recommendation: sensitive"]}
+        assert AllergySafetyFilter.has_allergen_concern(product, {"sensitive"})
+    
     def test_filter_strict_mode(self, sample_products):
         """Test strict mode removes all allergen products"""
         allergies = {"benzoyl_peroxide"}
@@ -281,79 +404,63 @@ class TestAllergySafetyFilter:
 class TestDermatologicalRanker:
     """Test dermatological safety scoring"""
     
-    def test_score_dermatological_safe(self):
-        """Test scoring dermatologically safe products"""
+    @pytest.mark.parametrize("dermatologically_safe,recommended_for,in_range", [
+        pytest.param(True, ["acne", "oily_skin", "sensitive"], lambda s: 100 <= s <= 120,
+                     id="test_score_dermatological_safe"),  # Maxed out, with bonuses
+        pytest.param(False, [], lambda s: 0 <= s < 100,
+                     id="test_score_dermatological_unsafe"),
+    ])
+    def test_score_dermatological_safety(self, dermatologically_safe, recommended_for, in_range):
+        """Test scoring tested and untested products"""
         product = MockProduct(
             id=1,
-            name="Safe Product",
+            name="Product",
             brand="Brand",
-            dermatologically_safe=True,
-            recommended_for=["acne", "oily_skin", "sensitive"]
+            dermatologically_safe=dermatologically_safe,
+            recommended_for=recommended_for
         )
         
         score = DermatologicalRanker.score_dermatological_safety(product)
         
-        assert score >= 100  # Should be maxed out
-        assert score <= 120  # With bonuses
+        assert in_range(score)
     
-    def test_score_dermatological_unsafe(self):
-        """Test scoring non-dermatologically tested products"""
+    def test_score_dermatological_cached(self):
+        """Test repeat scoring of the same credentials hits the cache"""
         product = MockProduct(
             id=1,
-            name="Untested Product",
+            name="Safe Product",
             brand="Brand",
-            dermatologically_safe=False,
-            recommended_for=[]
+            dermatologically_safe=True,
+            recommended_for=["acne", "oily_skin", "sensitive"]
         )
         
+        _dermatological_safety_score.cache_clear()
         score = DermatologicalRanker.score_dermatological_safety(product)
         
-        assert score < 100
-        assert score >= 0
-    
-    def test_score_product_quality_high_rating(self):
-        """Test quality scoring for highly rated products"""
+        assert DermatologicalRanker.score_dermatological_safety(product) == score
+        assert _dermatological_safety_score.cache_info().hits == 1
+    
+    @pytest.mark.parametrize("avg_rating,review_count,in_range", [
+        pytest.param(480, 200, lambda s: 50 < s <= 100,
+                     id="test_score_product_quality_high_rating"),  # 4.8 stars
+        pytest.param(200, 50, lambda s: 0 <= s < 50,
+                     id="test_score_product_quality_low_rating"),  # 2.0 stars
+        pytest.param(0, 0, lambda s: s == 0,
+                     id="test_score_product_quality_no_reviews"),
+    ])
+    def test_score_product_quality(self, avg_rating, review_count, in_range):
+        """Test quality scoring across rating/review levels"""
         product = MockProduct(
             id=1,
-            name="Great Product",
+            name="Product",
             brand="Brand",
-            avg_rating=480,  # 4.8 stars
-            review_count=200
+            avg_rating=avg_rating,
+            review_count=review_count
         )
         
         score = DermatologicalRanker.score_product_quality(product)
         
-        assert score > 50
-        assert score <= 100
-    
-    def test_score_product_quality_low_rating(self):
-        """Test quality scoring for low-rated products"""
-        product = MockProduct(
-            id=1,
-            name="Poor Product",
-            brand="Brand",
-            avg_rating=200,  # 2.0 stars
-            review_count=50
-        )
-        
-        score = DermatologicalRanker.score_product_quality(product)
-        
-        assert score >= 0
-        assert score < 50
-    
-    def test_score_product_quality_no_reviews(self):
-        """Test quality scoring for unreviewed products"""
-        product = MockProduct(
-            id=1,
-            name="Unreviewed Product",
-            brand="Brand",
-            avg_rating=0,
-            review_count=0
-        )
-        
-        score = DermatologicalRanker.score_product_quality(product)
-        
-        assert score == 0
+        assert in_range(score)
 
 
 # ===== TESTS: RankerEngine =====
@@ -419,6 +526,56 @@ class TestRankerEngine:
         scores = [r.score for r in ranked]
         assert scores == sorted(scores, reverse=True)
     
+    def test_topk_matches_fullsort(self, sample_products, user_profile_basic):
+        """Test heap top-k selection matches a full sort truncated to k"""
+        engine = RankerEngine()
+        full = engine.rank_products(sample_products, user_profile_basic, k=len(sample_products))
+        
+        for k in range(len(sample_products) + 1):
+            ranked = engine.rank_products(sample_products, user_profile_basic, k=k)
+            
+            assert [r.product.id for r in ranked] == [r.product.id for r in full[:k]]
+            assert [r.rank for r in ranked] == list(range(1, k + 1))
+    
+    def test_rank_memory_bounded(self, sample_products, user_profile_basic):
+        """Test scores are streamed to the top-k heap, not collected in a list"""
+        with patch.object(ranker_module.heapq, "nlargest", wraps=heapq.nlargest) as nlargest:
+            ranked = RankerEngine().rank_products(sample_products, user_profile_basic, k=2)
+        
+        scored = nlargest.call_args.args[1]
+        assert iter(scored) is scored  # a lazy iterator, never a materialized list
+        assert len(ranked) == 2
+    
+    @pytest.mark.parametrize("k", [1, 7, 100, 1000])
+    def test_vectorized_scoring_matches_scalar(self, large_product_set, user_profile_with_allergies, k):
+        """Test NumPy batch scoring ranks exactly like the per-product path"""
+        pytest.importorskip("numpy")
+        rng = random.Random(3)
+        conditions = ["sensitive", "dry_skin", "acne", "aging"]
+        products = [
+            MockProduct(
+                id=p.id,
+                name=p.name,
+                brand=p.brand,
+                ingredients=p.ingredients,
+                tags=p.tags,
+                avoid_for=p.avoid_for,
+                dermatologically_safe=rng.random() < 0.7,
+                recommended_for=rng.sample(conditions, rng.randint(0, 3)),
+                avg_rating=rng.choice([0, 300, 400, 450]),
+                review_count=rng.choice([0, 20, 100])
+            )
+            for p in large_product_set[:500]
+        ]
+        vectorized = RankerEngine()
+        scalar = RankerEngine()
+        scalar.VECTORIZE_MIN_PRODUCTS = len(products) + 1
+        
+        expected = scalar.rank_products(products, user_profile_with_allergies, k=k)
+        ranked = vectorized.rank_products(products, user_profile_with_allergies, k=k)
+        
+        assert [(r.product.id, r.score) for r in ranked] == [(r.product.id, r.score) for r in expected]
+    
     def test_filter_by_allergies(self, sample_products, user_profile_with_allergies):
         """Test that products with allergies are penalized"""
         engine = RankerEngine()
@@ -448,6 +605,34 @@ class TestRankerEngine:
         
         assert score > 50  # Should have some match
     
+    def test_condition_match_bitset_matches_python(self):
+        """Test bitset condition scoring matches plain set intersection"""
+        def reference_score(product, profile):
+            if not profile.conditions:
+                return 50
+            recommended_for = set(product.recommended_for or [])
+            if not recommended_for:
+                return 40
+            user_conditions = set(c.lower() for c in profile.conditions)
+            matching = user_conditions & recommended_for
+            if not matching:
+                return 30
+            return min(100, 60 + (len(matching) / len(user_conditions) * 40))
+        
+        rng = random.Random(7)
+        vocab = ["acne", "oily_skin", "dry_skin", "sensitive", "aging", "Acne", "eczema"]
+        engine = RankerEngine()
+        for i in range(500):
+            product = MockProduct(
+                id=i,
+                name="P",
+                brand="B",
+                recommended_for=rng.sample(vocab, rng.randint(0, 4))
+            )
+            profile = UserProfile(user_id=i, conditions=rng.sample(vocab, rng.randint(0, 4)))
+            
+            assert engine._score_condition_match(product, profile) == reference_score(product, profile)
+    
     def test_condition_no_match(self):
         """Test scoring with no condition match"""
         product = MockProduct(
@@ -471,47 +656,31 @@ class TestRankerEngine:
 class TestFeedbackScorer:
     """Test feedback-based scoring"""
     
-    def test_score_from_no_feedback(self):
-        """Test scoring when no feedback exists"""
-        feedback_stats = {
-            'avg_rating': 0,
-            'helpful_count': 0,
-            'total_feedback': 0,
-            'user_rated_before': False,
-            'user_rating': None
-        }
-        
-        score = FeedbackScorer.score_from_feedback(feedback_stats)
-        
-        assert score == 50  # Neutral score
-    
-    def test_score_from_high_feedback(self):
-        """Test scoring with high feedback"""
-        feedback_stats = {
-            'avg_rating': 4.5,
-            'helpful_count': 8,
-            'total_feedback': 10,
-            'user_rated_before': True,
-            'user_rating': 5
-        }
-        
-        score = FeedbackScorer.score_from_feedback(feedback_stats)
-        
-        assert score > 50
-    
-    def test_score_from_low_feedback(self):
-        """Test scoring with low feedback"""
-        feedback_stats = {
-            'avg_rating': 1.5,
-            'helpful_count': 1,
-            'total_feedback': 10,
-            'user_rated_before': False,
-            'user_rating': None
-        }
-        
+    @pytest.mark.parametrize("feedback_stats,in_range", [
+        pytest.param(
+            {'avg_rating': 0, 'helpful_count': 0, 'total_feedback': 0,
+             'user_rated_before': False, 'user_rating': None},
+            lambda s: s == 50,  # Neutral score
+            id="test_score_from_no_feedback"
+        ),
+        pytest.param(
+            {'avg_rating': 4.5, 'helpful_count': 8, 'total_feedback': 10,
+             'user_rated_before': True, 'user_rating': 5},
+            lambda s: s > 50,
+            id="test_score_from_high_feedback"
+        ),
+        pytest.param(
+            {'avg_rating': 1.5, 'helpful_count': 1, 'total_feedback': 10,
+             'user_rated_before': False, 'user_rating': None},
+            lambda s: s < 50,
+            id="test_score_from_low_feedback"
+        ),
+    ])
+    def test_score_from_feedback(self, feedback_stats, in_range):
+        """Test scoring from feedback statistics"""
         score = FeedbackScorer.score_from_feedback(feedback_stats)
         
-        assert score < 50
+        assert in_range(score)
 
 
 # ===== TESTS: Main rank_products Function =====
@@ -550,6 +719,7 @@ class TestRankProductsFunction:
 
 # ===== INTEGRATION TESTS =====
 
+@pytest.mark.slow
 class TestRankingIntegration:
     """Integration tests for complete ranking pipeline"""
     
@@ -635,6 +805,7 @@ class TestEdgeCases:
         
         assert len(ranked) == 0
     
+    @pytest.mark.slow
     def test_all_products_allergen_issue(self):
         """Test when all products have allergen concerns"""
         products = [
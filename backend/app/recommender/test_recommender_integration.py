@@ -19,33 +19,123 @@ Tests:
 """
 
 import pytest
+import copy
 import json
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, Any
 
-from sqlalchemy import create_engine, func, cast, Integer
+from sqlalchemy import create_engine, event, func, cast, inspect, select, Integer
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
 
 from backend.app.db.base import Base
 from backend.app.models.db_models import User, Profile, Photo, Analysis
 from backend.app.recommender.engine import RuleEngine
-from backend.app.recommender.models import Product, RuleLog, RecommendationRecord, RecommendationFeedback
+from backend.app.recommender.models import (
+    Product,
+    RuleLog,
+    RecommendationRecord,
+    RecommendationFeedback,
+    products_by_tag
+)
 from backend.app.recommender.schemas import FeedbackRequest
 
 
+# Session factory shared by all tests; each test binds it to its own connection.
+# commit() inside a test only releases a SAVEPOINT; the outer rollback undoes it.
+# Fixtures only flush for their ids, and nothing is expired on commit, so
+# asserts read from memory instead of refreshing
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    join_transaction_mode="create_savepoint",
+    expire_on_commit=False
+)
+
+
 # ===== TEST FIXTURES =====
 
-@pytest.fixture
-def test_db():
-    """Create in-memory SQLite database for testing."""
-    engine = create_engine("sqlite:///:memory:")
+# Database backends every DB test runs against; --db-url replaces them with one URL
+_DB_URLS = {
+    "sqlite_memory": lambda tmp_path_factory: "sqlite:///file:testdb?mode=memory&cache=shared&uri=true",
+    "sqlite_tmp": lambda tmp_path_factory: f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}",
+}
+
+
+@pytest.fixture(scope="session", params=list(_DB_URLS))
+def db_engine(request, tmp_path_factory):
+    """Create each backend's database and schema once per session."""
+    db_url = request.config.getoption("--db-url", default=None)
+    if db_url and request.param != next(iter(_DB_URLS)):
+        pytest.skip("--db-url given: running against that database only")
+    db_url = db_url or _DB_URLS[request.param](tmp_path_factory)
+    
+    if not db_url.startswith("sqlite"):
+        engine = create_engine(db_url)
+    else:
+        # StaticPool (+ shared cache in memory): every checkout sees the same database
+        engine = create_engine(
+            db_url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+        
+        @event.listens_for(engine, "connect")
+        def _configure_sqlite(dbapi_connection, connection_record):
+            # Let SQLAlchemy emit BEGIN/SAVEPOINT itself so nested rollbacks work
+            dbapi_connection.isolation_level = None
+            # Nothing here needs to survive the process: skip durability work
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA synchronous=OFF")
+            cursor.execute("PRAGMA journal_mode=MEMORY")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.execute("PRAGMA cache_size=-65536")
+            cursor.close()
+        
+        @event.listens_for(engine, "begin")
+        def _begin(connection):
+            connection.exec_driver_sql("BEGIN")
+    
+    if request.config.getoption("--db-url", default=None):
+        # Teardown drops the app schema, so never touch a database that has one
+        existing = set(inspect(engine).get_table_names()) & set(Base.metadata.tables)
+        if existing:
+            engine.dispose()
+            pytest.fail(
+                f"--db-url database already has app tables ({', '.join(sorted(existing))}); "
+                f"refusing to run because teardown drops them. Use an empty database."
+            )
+    
     Base.metadata.create_all(engine)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = SessionLocal()
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def test_db(db_engine):
+    """Session joined to an outer transaction that is rolled back after each test."""
+    connection = db_engine.connect()
+    transaction = connection.begin()
+    db = SessionLocal(bind=connection)
     
     yield db
     
     db.close()
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture(scope="session")
+def rule_engine() -> RuleEngine:
+    """Load and parse the rules once; apply_rules does not mutate the engine."""
+    return RuleEngine()
+
+
+@pytest.fixture(scope="session")
+def now_utc() -> datetime:
+    """Frozen UTC timestamp for created_at values (naive, like the model defaults)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 
 @pytest.fixture
@@ -83,8 +173,7 @@ def sample_user(test_db: Session) -> User:
         hashed_password="test_hash"
     )
     test_db.add(user)
-    test_db.commit()
-    test_db.refresh(user)
+    test_db.flush()
     return user
 
 
@@ -97,8 +186,7 @@ def sample_photo(test_db: Session, sample_user: User) -> Photo:
         s3_key="test_photos/test_photo.jpg"
     )
     test_db.add(photo)
-    test_db.commit()
-    test_db.refresh(photo)
+    test_db.flush()
     return photo
 
 
@@ -122,8 +210,7 @@ def sample_analysis_record(
         }
     )
     test_db.add(analysis)
-    test_db.commit()
-    test_db.refresh(analysis)
+    test_db.flush()
     return analysis
 
 
@@ -147,8 +234,7 @@ def salicylic_product(test_db: Session) -> Product:
         external_id="sephora_12345"
     )
     test_db.add(product)
-    test_db.commit()
-    test_db.refresh(product)
+    test_db.flush()
     return product
 
 
@@ -159,13 +245,12 @@ class TestRuleEngineWithSampleData:
     
     def test_engine_returns_required_structure(
         self,
+        rule_engine: RuleEngine,
         sample_analysis: Dict[str, Any],
         sample_profile: Dict[str, Any]
     ):
         """Test that apply_rules returns required recommendation structure."""
-        engine = RuleEngine()
-        
-        recommendation, applied_rules = engine.apply_rules(
+        recommendation, applied_rules = rule_engine.apply_rules(
             analysis=sample_analysis,
             profile=sample_profile
         )
@@ -189,13 +274,12 @@ class TestRuleEngineWithSampleData:
     
     def test_applied_rules_returns_list(
         self,
+        rule_engine: RuleEngine,
         sample_analysis: Dict[str, Any],
         sample_profile: Dict[str, Any]
     ):
         """Test that applied_rules is a list of rule IDs."""
-        engine = RuleEngine()
-        
-        recommendation, applied_rules = engine.apply_rules(
+        recommendation, applied_rules = rule_engine.apply_rules(
             analysis=sample_analysis,
             profile=sample_profile
         )
@@ -204,15 +288,28 @@ class TestRuleEngineWithSampleData:
             f"applied_rules should be list, got {type(applied_rules)}"
         # Note: applied_rules can be empty if no rules match exactly
     
+    def test_apply_rules_leaves_engine_unchanged(
+        self,
+        rule_engine: RuleEngine,
+        sample_analysis: Dict[str, Any],
+        sample_profile: Dict[str, Any]
+    ):
+        """Test that apply_rules does not mutate the shared engine's rules."""
+        rules_before = copy.deepcopy(rule_engine.rules)
+        
+        rule_engine.apply_rules(analysis=sample_analysis, profile=sample_profile)
+        
+        assert rule_engine.rules == rules_before, \
+            "apply_rules must not mutate the loaded rules"
+    
     def test_recommendation_structure_details(
         self,
+        rule_engine: RuleEngine,
         sample_analysis: Dict[str, Any],
         sample_profile: Dict[str, Any]
     ):
         """Test detailed structure of recommendation components."""
-        engine = RuleEngine()
-        
-        recommendation, applied_rules = engine.apply_rules(
+        recommendation, applied_rules = rule_engine.apply_rules(
             analysis=sample_analysis,
             profile=sample_profile
         )
@@ -245,9 +342,9 @@ class TestProductIntegration:
     ):
         """Test that product was created in database."""
         # Query the product back
-        product = test_db.query(Product).filter(
-            Product.name == "BHA Exfoliating Cleanser"
-        ).first()
+        product = test_db.scalar(
+            select(Product).where(Product.name == "BHA Exfoliating Cleanser")
+        )
         
         assert product is not None, "Product should exist in database"
         assert product.brand == "CeraVe"
@@ -260,20 +357,14 @@ class TestProductIntegration:
         salicylic_product: Product
     ):
         """Test querying products by tags."""
-        # Find products with salicylic_cleanser tag
-        products = test_db.query(Product).filter(
-            Product.tags.contains("salicylic_cleanser")  # This won't work with JSON
-        ).all()
-        
-        # Alternative: fetch all and filter in Python
-        all_products = test_db.query(Product).all()
-        acne_products = [
-            p for p in all_products
-            if p.tags and "salicylic_cleanser" in p.tags
-        ]
+        # Find products with salicylic_cleanser tag (filtered in SQL via JSON1)
+        acne_products = products_by_tag(test_db, "salicylic_cleanser")
         
         assert len(acne_products) > 0, "Should find salicylic cleanser products"
         assert acne_products[0].name == "BHA Exfoliating Cleanser"
+        
+        # Substring matches on other tags must not count as a hit
+        assert products_by_tag(test_db, "salicylic") == []
     
     def test_product_matches_analysis_conditions(
         self,
@@ -282,9 +373,9 @@ class TestProductIntegration:
         sample_analysis: Dict[str, Any]
     ):
         """Test that product is suitable for the analysis conditions."""
-        product = test_db.query(Product).filter(
-            Product.name == "BHA Exfoliating Cleanser"
-        ).first()
+        product = test_db.scalar(
+            select(Product).where(Product.name == "BHA Exfoliating Cleanser")
+        )
         
         analysis_conditions = sample_analysis["conditions_detected"]
         product_recommended = product.recommended_for or []
@@ -306,7 +397,8 @@ class TestRecommendationRecordIntegration:
         self,
         test_db: Session,
         sample_analysis_record: Analysis,
-        salicylic_product: Product
+        salicylic_product: Product,
+        now_utc: datetime
     ):
         """Test creating a recommendation record."""
         recommendation = RecommendationRecord(
@@ -321,13 +413,13 @@ class TestRecommendationRecordIntegration:
                 "diet": ["water", "antioxidants"]
             },
             source="rule_v1",
+            created_at=now_utc,
             rules_applied=["r001_acne_routine"],
             user_budget="medium"
         )
         
         test_db.add(recommendation)
         test_db.commit()
-        test_db.refresh(recommendation)
         
         # Verify it was saved
         assert recommendation.id is not None
@@ -343,7 +435,8 @@ class TestFeedbackIntegration:
         test_db: Session,
         sample_user: User,
         sample_analysis_record: Analysis,
-        salicylic_product: Product
+        salicylic_product: Product,
+        now_utc: datetime
     ):
         """Test submitting feedback on a recommendation."""
         # Create a recommendation first
@@ -357,11 +450,11 @@ class TestFeedbackIntegration:
                 "diet": []
             },
             source="rule_v1",
+            created_at=now_utc,
             rules_applied=["r001"]
         )
         test_db.add(recommendation)
-        test_db.commit()
-        test_db.refresh(recommendation)
+        test_db.flush()
         
         # Submit feedback
         feedback = RecommendationFeedback(
@@ -377,12 +470,11 @@ class TestFeedbackIntegration:
             adverse_reactions=None,
             would_recommend=True,
             product_ratings={"salicylic_cleanser": 5},
-            created_at=datetime.utcnow()
+            created_at=now_utc
         )
         
         test_db.add(feedback)
         test_db.commit()
-        test_db.refresh(feedback)
         
         # Verify feedback was saved
         assert feedback.id is not None
@@ -394,7 +486,8 @@ class TestFeedbackIntegration:
         test_db: Session,
         sample_user: User,
         sample_analysis_record: Analysis,
-        salicylic_product: Product
+        salicylic_product: Product,
+        now_utc: datetime
     ):
         """Test aggregating feedback statistics."""
         # Create recommendation
@@ -408,11 +501,11 @@ class TestFeedbackIntegration:
                 "diet": []
             },
             source="rule_v1",
+            created_at=now_utc,
             rules_applied=["r001"]
         )
         test_db.add(recommendation)
-        test_db.commit()
-        test_db.refresh(recommendation)
+        test_db.flush()
         
         # Submit multiple feedbacks
         feedbacks = [
@@ -424,7 +517,7 @@ class TestFeedbackIntegration:
                 product_satisfaction=5,
                 routine_completion_pct=100,
                 would_recommend=True,
-                created_at=datetime.utcnow()
+                created_at=now_utc
             ),
             RecommendationFeedback(
                 user_id=sample_user.id,
@@ -434,7 +527,7 @@ class TestFeedbackIntegration:
                 product_satisfaction=4,
                 routine_completion_pct=80,
                 would_recommend=True,
-                created_at=datetime.utcnow()
+                created_at=now_utc
             ),
             RecommendationFeedback(
                 user_id=sample_user.id,
@@ -444,16 +537,15 @@ class TestFeedbackIntegration:
                 product_satisfaction=3,
                 routine_completion_pct=50,
                 would_recommend=False,
-                created_at=datetime.utcnow()
+                created_at=now_utc
             )
         ]
         
-        for fb in feedbacks:
-            test_db.add(fb)
+        test_db.add_all(feedbacks)
         test_db.commit()
         
         # Query aggregate stats
-        stats = test_db.query(
+        stats = test_db.execute(select(
             func.count(RecommendationFeedback.id).label('count'),
             func.avg(RecommendationFeedback.helpful_rating).label('avg_helpful'),
             func.avg(RecommendationFeedback.product_satisfaction).label('avg_satisfaction'),
@@ -461,9 +553,9 @@ class TestFeedbackIntegration:
             func.sum(
                 cast(RecommendationFeedback.would_recommend, Integer)
             ).label('would_recommend_count')
-        ).filter(
+        ).where(
             RecommendationFeedback.recommendation_id == recommendation.id
-        ).first()
+        )).one()
         
         # Verify aggregates
         assert stats.count == 3, f"Should have 3 feedbacks, got {stats.count}"
@@ -504,7 +596,9 @@ class TestEndToEndRecommendation:
         sample_photo: Photo,
         sample_analysis: Dict[str, Any],
         sample_profile: Dict[str, Any],
-        salicylic_product: Product
+        salicylic_product: Product,
+        rule_engine: RuleEngine,
+        now_utc: datetime
     ):
         """Test complete flow from analysis to feedback."""
         # 1. Create analysis
@@ -517,12 +611,10 @@ class TestEndToEndRecommendation:
             confidence_scores={"skin_type": 0.85}
         )
         test_db.add(analysis)
-        test_db.commit()
-        test_db.refresh(analysis)
+        test_db.flush()
         
         # 2. Run rule engine
-        engine = RuleEngine()
-        recommendation, applied_rules = engine.apply_rules(
+        recommendation, applied_rules = rule_engine.apply_rules(
             analysis=sample_analysis,
             profile=sample_profile
         )
@@ -537,11 +629,11 @@ class TestEndToEndRecommendation:
             recommendation_id=f"rec_{analysis.id}",
             content=recommendation if isinstance(recommendation, dict) else {},
             source="rule_v1",
+            created_at=now_utc,
             rules_applied=applied_rules
         )
         test_db.add(rec_record)
-        test_db.commit()
-        test_db.refresh(rec_record)
+        test_db.flush()
         
         # 4. Submit feedback
         feedback = RecommendationFeedback(
@@ -549,7 +641,8 @@ class TestEndToEndRecommendation:
             analysis_id=analysis.id,
             recommendation_id=rec_record.id,
             helpful_rating=5,
-            would_recommend=True
+            would_recommend=True,
+            created_at=now_utc
         )
         test_db.add(feedback)
         test_db.commit()
@@ -559,14 +652,16 @@ class TestEndToEndRecommendation:
         assert feedback.id is not None
         
         # Verify we can query everything back
-        stored_rec = test_db.query(RecommendationRecord).filter(
-            RecommendationRecord.id == rec_record.id
-        ).first()
+        stored_rec = test_db.scalar(
+            select(RecommendationRecord).where(RecommendationRecord.id == rec_record.id)
+        )
         assert stored_rec is not None
         
-        stored_feedback = test_db.query(RecommendationFeedback).filter(
-            RecommendationFeedback.recommendation_id == rec_record.id
-        ).first()
+        stored_feedback = test_db.scalar(
+            select(RecommendationFeedback).where(
+                RecommendationFeedback.recommendation_id == rec_record.id
+            )
+        )
         assert stored_feedback is not None
         assert stored_feedback.helpful_rating == 5
 
@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
 class UserCreate(BaseModel):
@@ -36,7 +36,7 @@ class ProfileRead(ProfileCreate):
     id: int
     user_id: int
 
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class PhotoCreate(BaseModel):
@@ -49,7 +49,7 @@ class PhotoRead(PhotoCreate):
     user_id: int
     uploaded_at: Optional[datetime] = None
 
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class AnalysisOut(BaseModel):
@@ -64,9 +64,7 @@ class AnalysisOut(BaseModel):
     # confidence_scores usually a mapping from label->score
     confidence_scores: Optional[Dict[str, float]] = None
 
-    model_config = {"from_attributes": True}
-from pydantic import BaseModel
-from typing import Optional, List
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class Profile(BaseModel):
@@ -84,15 +82,6 @@ class AnalysisResult(BaseModel):
     confidence: float
 
 
-class Token(BaseModel):
-    access_token: str
-    token_type: str = "bearer"
-
-
-class TokenData(BaseModel):
-    username: Optional[str] = None
-
-
 class AnalysisResponse(BaseModel):
     skin_type: str
     hair_type: str
@@ -103,18 +92,12 @@ class AnalysisResponse(BaseModel):
 ### DB models schemas
 
 
-class UserCreate(BaseModel):
-    username: str
-    email: Optional[str]
-    password: Optional[str]
-
-
 class UserOut(BaseModel):
     id: int
     username: str
     email: Optional[str]
 
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ProfileIn(BaseModel):
@@ -129,7 +112,7 @@ class ProfileOut(ProfileIn):
     id: int
     user_id: int
 
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PhotoOut(BaseModel):
@@ -138,20 +121,7 @@ class PhotoOut(BaseModel):
     s3_key: Optional[str]
     uploaded_at: Optional[str]
 
-    model_config = {"from_attributes": True}
-
-
-class AnalysisOut(BaseModel):
-    id: int
-    user_id: int
-    photo_id: Optional[int]
-    timestamp: Optional[str]
-    skin_type: Optional[str]
-    hair_type: Optional[str]
-    conditions: Optional[str]
-    confidence_scores: Optional[dict]
-
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True)
 
 
 class RecommendationOut(BaseModel):
@@ -161,7 +131,7 @@ class RecommendationOut(BaseModel):
     content: str
     source: Optional[str]
 
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True)
 
 
 class FeedbackOut(BaseModel):
@@ -172,4 +142,4 @@ class FeedbackOut(BaseModel):
     comment: Optional[str]
     created_at: Optional[str]
 
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True)
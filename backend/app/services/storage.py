@@ -1,12 +1,28 @@
 import os
+import shutil
 import uuid
 from typing import Dict, Optional
 
+# Streaming copy/upload chunk sizes; memory stays bounded by these, not file size
+LOCAL_COPY_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+S3_MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MiB
+
 
 def _ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
 
 
+def _local_fallback_path(bucket: str, key: str) -> str:
+    """Path under `storage/<bucket>/` used when S3 is unavailable."""
+    storage_dir = os.path.join(os.getcwd(), 'storage', bucket)
+    _ensure_dir(storage_dir)
+    # sanitize key for filesystem
+    local_name = key.replace('/', '_')
+    if not local_name:
+        local_name = str(uuid.uuid4())
+    return os.path.join(storage_dir, local_name)
+
+
 def upload_to_s3(bucket: str, key: str, data: bytes, expire_seconds: int = 3600) -> Dict:
     """Upload bytes to S3 and return metadata including a presigned URL when possible.
 
@@ -34,14 +50,7 @@ def upload_to_s3(bucket: str, key: str, data: bytes, expire_seconds: int = 3600)
         return {"bucket": bucket, "key": key, "url": url}
     except Exception:
         # Fallback to local storage
-        storage_dir = os.path.join(os.getcwd(), 'storage', bucket)
-        _ensure_dir(storage_dir)
-        local_name = key
-        # sanitize key for filesystem
-        local_name = local_name.replace('/', '_')
-        if not local_name:
-            local_name = str(uuid.uuid4())
-        local_path = os.path.join(storage_dir, local_name)
+        local_path = _local_fallback_path(bucket, key)
         with open(local_path, 'wb') as f:
             f.write(data)
         return {"bucket": bucket, "key": key, "url": f"file://{local_path}"}
@@ -50,6 +59,10 @@ def upload_to_s3(bucket: str, key: str, data: bytes, expire_seconds: int = 3600)
 def upload_file(path: str, bucket: str, key: Optional[str] = None, expire_seconds: int = 3600) -> Dict:
     """Upload a file on disk to S3 or local storage fallback.
 
+    The file is streamed rather than read into memory: boto3's managed transfer
+    sends it in multipart chunks on worker threads, and the local fallback copies
+    it in fixed-size blocks. Use `upload_to_s3` when the data is already bytes.
+
     Args:
         path: local file path
         bucket: target bucket name (or local folder)
@@ -61,7 +74,27 @@ def upload_file(path: str, bucket: str, key: Optional[str] = None, expire_second
     if key is None:
         key = os.path.basename(path)
     with open(path, 'rb') as fh:
-        return upload_to_s3(bucket=bucket, key=key, data=fh.read(), expire_seconds=expire_seconds)
+        try:
+            import boto3  # type: ignore
+            from boto3.s3.transfer import TransferConfig
+
+            s3 = boto3.client('s3')
+            config = TransferConfig(
+                multipart_threshold=S3_MULTIPART_CHUNK_SIZE,
+                multipart_chunksize=S3_MULTIPART_CHUNK_SIZE,
+                max_concurrency=8,
+                use_threads=True,
+            )
+            s3.upload_fileobj(fh, bucket, key, Config=config)
+            url = s3.generate_presigned_url('get_object', Params={'Bucket': bucket, 'Key': key}, ExpiresIn=expire_seconds)
+            return {"bucket": bucket, "key": key, "url": url}
+        except Exception:
+            # Fallback to local storage; a failed upload may have consumed part of the file
+            fh.seek(0)
+            local_path = _local_fallback_path(bucket, key)
+            with open(local_path, 'wb') as out:
+                shutil.copyfileobj(fh, out, length=LOCAL_COPY_CHUNK_SIZE)
+            return {"bucket": bucket, "key": key, "url": f"file://{local_path}"}
 
 
 def save_image_local(data: bytes, filename: Optional[str] = None, subdir: str = "images") -> Dict:
@@ -115,6 +115,66 @@ def test_analyze_image_local():
             pass
 
 
+class _CountingModel:
+    """Stand-in for the PyTorch model that counts predict() calls."""
+    
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+    
+    def predict(self, image):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("CUDA out of memory")
+        return {
+            'predicted_class': 1,
+            'class_name': 'dry',
+            'confidence': 0.9,
+            'probabilities': [0.1, 0.9]
+        }
+
+
+def test_analyze_image_result_cache(monkeypatch):
+    """Test that repeat images are served from the result cache, mock results excluded."""
+    print("\n" + "="*60)
+    print("TEST: Analyze Image Result Cache")
+    print("="*60)
+    
+    monkeypatch.setattr(ml_infer, "_models_initialized", True)
+    monkeypatch.setattr(ml_infer, "_tflite_inference", None)
+    monkeypatch.setattr(ml_infer, "_onnx_inference", None)
+    monkeypatch.setattr(ml_infer, "_result_cache", ml_infer.OrderedDict())
+    
+    # Every model fails: the mock fallback is returned but not cached
+    failing = _CountingModel(fail=True)
+    monkeypatch.setattr(ml_infer, "_pytorch_inference", failing)
+    image = b"\xff\xd8 not really a jpeg"
+    assert ml_infer.analyze_image(image)['model_type'] == "mock"
+    assert len(ml_infer._result_cache) == 0
+    
+    # Model recovered: the same image gets a real analysis
+    model = _CountingModel()
+    monkeypatch.setattr(ml_infer, "_pytorch_inference", model)
+    first = ml_infer.analyze_image(image)
+    assert first['model_type'] == "pytorch"
+    assert first['class_name'] == "dry"
+    assert model.calls == 1
+    
+    # Mutating a returned result must not leak into the cache
+    first['probabilities'].clear()
+    first['class_name'] = "changed"
+    
+    second = ml_infer.analyze_image(image)
+    assert model.calls == 1, "Repeat image should be a cache hit"
+    assert second['class_name'] == "dry"
+    assert second['probabilities'] == [0.1, 0.9]
+    
+    # Different bytes miss the cache
+    ml_infer.analyze_image(image + b"\x00")
+    assert model.calls == 2
+    print("[PASS] Result cache test passed")
+
+
 if __name__ == '__main__':
     print("\n" + "="*60)
     print("ML Inference Service Test Suite")
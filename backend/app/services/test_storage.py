@@ -0,0 +1,43 @@
+"""
+Tests for the storage service local fallback.
+"""
+
+import os
+
+from backend.app.services import storage
+
+
+def test_upload_file_local_fallback_streams_file(tmp_path, monkeypatch):
+    """Without S3 the file is copied to storage/<bucket>/ unchanged."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage, "LOCAL_COPY_CHUNK_SIZE", 1024)
+    data = os.urandom(10 * 1024 + 7)
+    src = tmp_path / "photo.jpg"
+    src.write_bytes(data)
+
+    # No credentials/endpoint: boto3 (if installed) fails and the fallback runs
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "invalid")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "invalid")
+    monkeypatch.setenv("AWS_ENDPOINT_URL", "http://127.0.0.1:9")
+
+    result = storage.upload_file(str(src), bucket="test-bucket", key="users/1/photo.jpg")
+
+    local_path = tmp_path / "storage" / "test-bucket" / "users_1_photo.jpg"
+    assert result == {
+        "bucket": "test-bucket",
+        "key": "users/1/photo.jpg",
+        "url": f"file://{local_path}",
+    }
+    assert local_path.read_bytes() == data
+
+
+def test_upload_to_s3_local_fallback_matches_upload_file(tmp_path, monkeypatch):
+    """The bytes path and the file path share the same fallback location."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("AWS_ENDPOINT_URL", "http://127.0.0.1:9")
+
+    result = storage.upload_to_s3(bucket="b", key="a/b.jpg", data=b"abc")
+
+    local_path = tmp_path / "storage" / "b" / "a_b.jpg"
+    assert result["url"] == f"file://{local_path}"
+    assert local_path.read_bytes() == b"abc"
@@ -26,6 +26,11 @@ logging.basicConfig(
 )
 
 
+# ImageNet statistics, float32 and shaped (1, 1, 3) to broadcast over HWC images
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32).reshape(1, 1, 3)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32).reshape(1, 1, 3)
+
+
 def preprocess_image(
     image_path: str,
     input_size: Tuple[int, int] = (224, 224)
@@ -49,15 +54,12 @@ def preprocess_image(
     # Convert to array and normalize to [0, 1]
     image_array = np.array(image, dtype=np.float32) / 255.0
     
-    # Normalize using ImageNet statistics
-    mean = np.array([0.485, 0.456, 0.406])
-    std = np.array([0.229, 0.224, 0.225])
-    image_array = (image_array - mean) / std
-    
-    # Add batch dimension and transpose to (1, 3, H, W)
-    image_array = np.expand_dims(image_array, axis=0).transpose(0, 3, 1, 2)
+    # Normalize using ImageNet statistics (stays float32)
+    image_array -= IMAGENET_MEAN
+    image_array /= IMAGENET_STD
     
-    return image_array.astype(np.float32)
+    # Add batch dimension and transpose to contiguous (1, 3, H, W)
+    return np.ascontiguousarray(image_array.transpose(2, 0, 1)[np.newaxis])
 
 
 def postprocess_output(logits: np.ndarray) -> Dict[str, any]: